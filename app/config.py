@@ -10,6 +10,9 @@ class Settings(BaseSettings):
     WEAVIATE_API_KEY: str
     GOOGLE_KEY_PATH: str | None = None
     MODEL: str = "openai/gpt-4o"
+    # Shortened text-embedding-3-small output (e.g. 256 or 512), None for the full 1536 dimensions.
+    # Must match the dimension the Weaviate collections were loaded with.
+    EMBEDDING_DIM: int | None = None
 
     model_config = SettingsConfigDict(
         frozen=True,
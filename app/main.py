@@ -1,8 +1,12 @@
 import streamlit as st
+from app.services import start_warmup
 from app.utils import render_sidebar
 
 st.set_page_config(page_title="NewsChat - Home", layout="wide")
 
+# Preconnect the chatbot in the background while the user is on the home page
+start_warmup()
+
 render_sidebar()
 
 st.title("🗞️ Welcome to NewsChat!")
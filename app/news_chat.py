@@ -1,25 +1,82 @@
-from typing import Optional, Dict, Any, List
-from datetime import datetime
-from weaviate.classes.query import Filter, MetadataQuery, QueryReference
-from google.adk.agents import Agent
-from google.adk.tools import FunctionTool, ToolContext
-from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
-from google.adk.models.lite_llm import LiteLlm
-from google.genai import types
-from langsmith import traceable
-import weaviate
-from openai import OpenAI
-
-# Initialise OpenAI client
-oa_client = OpenAI()
-
-def get_embedding(text: str, model="text-embedding-3-small") -> list[float]:
+from typing import Optional, Dict, Any, List, TYPE_CHECKING
+from datetime import datetime, timezone
+from functools import lru_cache, wraps
+
+from app.rate_limit import INTERACTIVE, estimate_message_tokens, estimate_tokens, get_limiter, response_tokens
+
+# Heavy dependencies (google.adk, litellm, langsmith, weaviate, openai) are imported lazily,
+# so importing this module is cheap and the cost is paid by the warm-up path instead.
+# Tool signatures must only use annotations resolvable at runtime, as FunctionTool evaluates them.
+if TYPE_CHECKING:
+    import weaviate
+    from openai import OpenAI
+    from google.adk.agents.readonly_context import ReadonlyContext
+    from weaviate.classes.query import Filter
+
+
+@lru_cache(maxsize=1)
+def get_oa_client() -> "OpenAI":
+    """Initialise the OpenAI client on first use."""
+    from openai import OpenAI
+    return OpenAI(max_retries=0)
+
+
+def get_embedding(text: str, model="text-embedding-3-small", dimensions: Optional[int] = None) -> list[float]:
     text = text.replace("\n", " ")
-    return oa_client.embeddings.create(input = [text], model=model).data[0].embedding
+    # Only send dimensions when shortening, so the default request is unchanged
+    params = {"dimensions": dimensions} if dimensions else {}
+    res = get_limiter(model).call(
+        get_oa_client().embeddings.create,
+        priority=INTERACTIVE,
+        tokens=estimate_tokens(text),
+        usage=response_tokens,
+        input=[text],
+        model=model,
+        **params,
+    )
+    return res.data[0].embedding
+
+
+@lru_cache(maxsize=1)
+def _rate_limited_client_class() -> type:
+    """LiteLLM client for the ADK model that sends the agent's requests through the rate limiter as interactive traffic."""
+    from google.adk.models.lite_llm import LiteLLMClient
+
+    class RateLimitedLiteLLMClient(LiteLLMClient):
+        async def acompletion(self, model, messages, tools, **kwargs):
+            return await get_limiter(model).acall(
+                super().acompletion,
+                model,
+                messages,
+                tools,
+                priority=INTERACTIVE,
+                tokens=estimate_message_tokens(messages, tools),
+                usage=response_tokens,
+                **kwargs,
+            )
+
+    return RateLimitedLiteLLMClient
 
 
-def _and(a: Optional[Filter], b: Optional[Filter]) -> Filter:
+def _traceable(name: str):
+    """Langsmith traceable decorator that defers importing langsmith until the first call."""
+    def decorator(func):
+        traced = None
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            nonlocal traced
+            if traced is None:
+                from langsmith import traceable
+                traced = traceable(name=name)(func)
+            return traced(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _and(a: Optional["Filter"], b: "Filter") -> "Filter":
     """Combine Weaviate filters."""
     return b if a is None else (a & b)
 
@@ -40,32 +97,62 @@ def _to_rfc3339_end(s: str) -> str:
     return f"{s}T23:59:59Z"
 
 
+def _parse_rfc3339(s: str) -> datetime:
+    dt = datetime.fromisoformat(s.replace("Z", "+00:00"))
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def _articles_in_range(props: Dict[str, Any], first_day: Optional[str], last_day: Optional[str]) -> int:
+    """Number of a cluster's articles published between two YYYY-MM-DD days (inclusive), from its daily_counts."""
+    return sum(
+        d.get("count") or 0
+        for d in props.get("daily_counts") or []
+        if (first_day is None or d.get("day") >= first_day) and (last_day is None or d.get("day") <= last_day)
+    )
+
+
+def _ref_objects(o: Any, link_on: str) -> list:
+    """Extract referenced objects for a link from a query result object (handles common response shapes)."""
+    refs_obj = getattr(o, "references", None) or {}
+    ref = refs_obj.get(link_on)
+    if ref is None:
+        return []
+    if hasattr(ref, "objects"):
+        return ref.objects or []
+    if isinstance(ref, dict):
+        return ref.get("objects") or []
+    return []
+
+
 class NewsChat:
     """
     A comprehensive utility for interacting with a news database to facilitate searching and answering queries in natural language.
     """
-    SYSTEM_PROMPT = f"""
+    # "{today}" is filled in on every turn by _instruction
+    SYSTEM_PROMPT = """
 You are a helpful news assistant that answers users query by exploring news database for Finance, Music, Lifestyle and Sports categories.
-Today is {datetime.now().strftime("%A, %B %-d, %Y")}.
+Today is {today}.
 Database:
-- Cluster collection fields: cluster_id, title, summary, category, num_articles, keywords
+- Cluster collection fields: cluster_id, title, summary, category, num_articles, keywords, first_published, last_published
 - Article collection fields: url, author, title, published, summary, category
-- Cross-reference: Article.cluster -> Cluster
+- Cross-reference: Article.cluster -> Cluster, Cluster.articles -> Article
 
 Important:
-- Clusters do NOT have dates. Do NOT apply date filtering to clusters.
-- Date filtering (start_date/end_date) applies ONLY to articles via Article.published.
+- A cluster's dates come from its articles: first_published and last_published are its earliest and latest article.
+- With start_date/end_date, search_clusters returns clusters with articles published in the range, ranked by
+  articles_in_range (their number of articles in the range). Use this for "top stories this week/today" instead
+  of fetching articles and counting them yourself.
 
 Tools:
-- Use search_clusters for topics, highlights, news, stories(ranked by num_articles from tool results if needed).
-- Use search_articles for article search, author search, sources, time ranges, or listing articles within a cluster (use cluster_id).
-- If user asks for "articles in a cluster", do:
-  1) search_clusters(query=..., category=..., limit=...) to find the cluster_id
-  2) search_articles(cluster_id=..., ...) to list articles
+- Use search_clusters for topics, highlights, news, stories, also within a time range (ranked by articles_in_range, otherwise by num_articles from tool results if needed).
+- Use search_articles for article search, author search, sources or time ranges across all articles.
+- Use search_clusters_with_articles when the user wants stories together with their articles (e.g. "articles in a cluster", "sources for a story").
+  It returns the matching clusters and their most recent articles in one call, so do NOT call search_clusters first to find the cluster_id.
+- Use search_articles(cluster_id=...) only when the cluster_id is already known from previous results.
 
 Filtering:
 - Category must be one of: Sports, Lifestyle, Music, Finance (use exact casing).
-- If user specifies a time range (e.g., "last 7 days", "since Jan 10", "today"), pass start_date/end_date to search_articles.
+- If user specifies a time range (e.g., "last 7 days", "since Jan 10", "today"), pass start_date/end_date (YYYY-MM-DD) to the tool.
 - If the user does NOT specify keywords, you may call tools with query="" and rely on filters.
 
 
@@ -80,16 +167,20 @@ Tool: search_articles(query="Jane Doe", limit=50)
 
 3) Articles in a cluster:
 User: "Show me articles from the AI cluster"
-Tool: search_articles(cluster_id="<cluster_id>", limit=10)
+Tool: search_clusters_with_articles(query="AI", limit=1, articles_per_cluster=10)
 
 4) Category filtering:
 User: "Give me top stories about finance"
 Tool: search_clusters(query="", category="Finance", limit=10)
 
-5) Date filtering on articles only:
+5) Date filtering on articles:
 User: "Sports articles from the last 7 days about Novak Djokovic"
 Tool: search_articles(query="Novak Djokovic", category="Sports", start_date="2026-01-18", end_date="2026-01-25", limit=10)
 
+6) Top stories in a time range:
+User: "What were the top stories this week?"
+Tool: search_clusters(query="", start_date="2026-01-19", end_date="2026-01-25", limit=10)
+
 Response style:
 - Be concise and data-driven. If needed, summarise the response and only output what is relevant.
 - Keep your tone formal.
@@ -99,25 +190,34 @@ Response style:
 
     def __init__(
             self,
-            weaviate_client: weaviate.WeaviateClient,
+            weaviate_client: "weaviate.WeaviateClient",
             model: str = "openai/gpt-4o",
             app_name: str = "news_chat",
+            embedding_dim: Optional[int] = None,
     ):
+        from google.adk.agents import Agent
+        from google.adk.models.lite_llm import LiteLlm
+        from google.adk.runners import Runner
+        from google.adk.sessions import InMemorySessionService
+        from google.adk.tools import FunctionTool
+
         self.client = weaviate_client
         self.app_name = app_name
+        self.embedding_dim = embedding_dim
 
-        self.model = LiteLlm(model=model)
+        self.model = LiteLlm(model=model, num_retries=0, llm_client=_rate_limited_client_class()())
         self.session_service = InMemorySessionService()
 
         # Tools
         self.cluster_tool = FunctionTool(func=self.search_clusters)
         self.article_tool = FunctionTool(func=self.search_articles)
+        self.cluster_articles_tool = FunctionTool(func=self.search_clusters_with_articles)
 
         self.agent = Agent(
             name="news_agent",
             model=self.model,
-            instruction=self.SYSTEM_PROMPT,
-            tools=[self.cluster_tool, self.article_tool],
+            instruction=self._instruction,
+            tools=[self.cluster_tool, self.article_tool, self.cluster_articles_tool],
         )
 
         self.runner = Runner(
@@ -126,6 +226,23 @@ Response style:
             session_service=self.session_service,
         )
 
+    # ---------- Instruction ----------
+    def _instruction(self, ctx: "ReadonlyContext") -> str:
+        """Build the system prompt per turn so the current date never goes stale."""
+        return self.SYSTEM_PROMPT.format(today=datetime.now().strftime("%A, %B %-d, %Y"))
+
+    # ---------- Warm-up ----------
+    def warm_up(self) -> None:
+        """
+        Open connections ahead of the first user query.
+        - Checks the Weaviate connection and loads the collection configs
+        - Primes the OpenAI client's connection pool with an embedding request
+        """
+        self.client.is_ready()
+        for name in ("Cluster", "Article"):
+            self.client.collections.get(name).config.get()
+        get_embedding("warm up", dimensions=self.embedding_dim)
+
     # ---------- Session ----------
     # @traceable(name="create_session")
     def create_session(self, user_id: str, session_id: Optional[str] = None) -> str:
@@ -143,16 +260,24 @@ Response style:
         self,
         query: str = "",
         category: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
         limit: int = 5,
-        tool_context: Optional[ToolContext] = None,
+        tool_context: Optional[Any] = None,  # ToolContext, passed by ADK by parameter name
     ) -> Dict[str, Any]:
         """
         Search News/Highlights/Story Cluster objects.
-        - No date filtering here (clusters have no dates).
+        - Supports category filtering via Cluster.category
+        - Date filtering (start_date/end_date) keeps clusters with articles published in the range,
+          using Cluster.first_published/last_published, and ranks them by their number of articles
+          in the range (Cluster.daily_counts). With a query, the 100 most relevant clusters in the range
+          are ranked; without one, the ranking covers every cluster in the range.
         """
         if tool_context is None:
             raise ValueError("tool_context is required")
 
+        from weaviate.classes.query import Filter, MetadataQuery, Sort
+
         client: weaviate.WeaviateClient = tool_context.state["app:weaviate_client"]
         col = client.collections.get("Cluster")
 
@@ -160,42 +285,85 @@ Response style:
         q = (query or "").strip()
 
         # Capping it incase the model suggests a very high limit
-        limit = max(limit, 50)
+        limit = max(1, min(limit, 50))
 
         f: Optional[Filter] = None
         if category:
             f = _and(f, Filter.by_property("category").equal(category))
 
+        dated = bool(start_date or end_date)
+        if start_date:
+            f = _and(f, Filter.by_property("last_published").greater_or_equal(_to_rfc3339_start(start_date)))
+        if end_date:
+            f = _and(f, Filter.by_property("first_published").less_or_equal(_to_rfc3339_end(end_date)))
+
+        first_day = _to_rfc3339_start(start_date)[:10] if start_date else None
+        last_day = _to_rfc3339_end(end_date)[:10] if end_date else None
+
         if q:
+            # With dates, the most relevant candidates are ranked by their articles in the range
             res = col.query.hybrid(
                 query=q,
-                vector=get_embedding(q),
+                vector=get_embedding(q, dimensions=self.embedding_dim),
                 alpha=0.7,
-                limit=limit,
+                limit=100 if dated else limit,
                 filters=f,
                 return_metadata=MetadataQuery(score=True),
             )
-        else:
+            objects = res.objects
+        elif not dated:
             res = col.query.fetch_objects(
                 limit=limit,
                 filters=f,
                 return_metadata=MetadataQuery(score=True),
             )
+            objects = res.objects
+        else:
+            # Page through the clusters largest first. A cluster has at most num_articles articles in the
+            # range, so once the limit-th best articles_in_range reaches the num_articles of the last
+            # cluster fetched, no cluster left can rank higher.
+            page_size = 100
+            objects = []
+            while True:
+                res = col.query.fetch_objects(
+                    limit=page_size,
+                    offset=len(objects),
+                    filters=f,
+                    sort=Sort.by_property("num_articles", ascending=False),
+                    return_metadata=MetadataQuery(score=True),
+                )
+                objects.extend(res.objects)
+                if len(res.objects) < page_size:
+                    break
+                counts = sorted((_articles_in_range(o.properties or {}, first_day, last_day) for o in objects), reverse=True)
+                if len(counts) >= limit and counts[limit - 1] >= ((res.objects[-1].properties or {}).get("num_articles") or 0):
+                    break
 
         out: List[Dict[str, Any]] = []
-        for o in res.objects:
+        for o in objects:
             p = o.properties or {}
-            out.append(
-                {
-                    "cluster_id": p.get("cluster_id"),
-                    "title": p.get("title"),
-                    "summary": p.get("summary"),
-                    "category": p.get("category"),
-                    "num_articles": p.get("num_articles"),
-                    "keywords": p.get("keywords"),
-                    "score": getattr(o.metadata, "score", None),
-                }
-            )
+            cluster = {
+                "cluster_id": p.get("cluster_id"),
+                "title": p.get("title"),
+                "summary": p.get("summary"),
+                "category": p.get("category"),
+                "num_articles": p.get("num_articles"),
+                "keywords": p.get("keywords"),
+                "first_published": p.get("first_published"),
+                "last_published": p.get("last_published"),
+                "score": getattr(o.metadata, "score", None),
+            }
+            if dated:
+                cluster["articles_in_range"] = _articles_in_range(p, first_day, last_day)
+                # The range may fall between two days with articles
+                if not cluster["articles_in_range"]:
+                    continue
+            out.append(cluster)
+
+        if dated:
+            # Stable sort, so relevance order is kept between clusters with the same count
+            out.sort(key=lambda c: c["articles_in_range"], reverse=True)
+            out = out[:limit]
 
         # # Save context for follow-up queries
         # tool_context.state["last_clusters"] = out[:10]
@@ -214,7 +382,7 @@ Response style:
         end_date: Optional[str] = None,
         limit: int = 10,
         cluster_id: Optional[str] = None,
-        tool_context: Optional[ToolContext] = None,
+        tool_context: Optional[Any] = None,  # ToolContext, passed by ADK by parameter name
     ) -> dict[str, Any]:
         """
         Search Article objects.
@@ -226,6 +394,8 @@ Response style:
         if tool_context is None:
             raise ValueError("tool_context is required")
 
+        from weaviate.classes.query import Filter, MetadataQuery, QueryReference
+
         client: weaviate.WeaviateClient = tool_context.state["app:weaviate_client"]
         col = client.collections.get("Article")
 
@@ -233,7 +403,7 @@ Response style:
         q = (query or "").strip()
 
         # Capping it incase the model suggests a very high limit
-        limit = max(limit, 50)
+        limit = max(1, min(limit, 50))
 
         f: Optional[Filter] = None
 
@@ -259,7 +429,7 @@ Response style:
         if q:
             res = col.query.hybrid(
                 query=q,
-                vector=get_embedding(q),
+                vector=get_embedding(q, dimensions=self.embedding_dim),
                 alpha=0.6,
                 limit=limit,
                 filters=f,
@@ -278,15 +448,9 @@ Response style:
         for o in res.objects:
             p = o.properties or {}
 
-            # Extract referenced cluster (handles common response shapes)
+            # Extract referenced cluster
             cluster_ref = None
-            refs_obj = getattr(o, "references", None) or {}
-            cluster_objs = None
-
-            if "cluster" in refs_obj and hasattr(refs_obj["cluster"], "objects"):
-                cluster_objs = refs_obj["cluster"].objects
-            elif isinstance(refs_obj.get("cluster"), dict):
-                cluster_objs = refs_obj["cluster"].get("objects")
+            cluster_objs = _ref_objects(o, "cluster")
 
             if cluster_objs:
                 cluster_ref = (cluster_objs[0].properties or {})
@@ -309,9 +473,127 @@ Response style:
 
         return {"count": len(out), "results": out}
 
+    # ---------- Tool: Clusters with articles ----------
+    # @traceable(name="tool.search_clusters_with_articles")
+    def search_clusters_with_articles(
+        self,
+        query: str = "",
+        category: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        limit: int = 5,
+        articles_per_cluster: int = 5,
+        tool_context: Optional[Any] = None,  # ToolContext, passed by ADK by parameter name
+    ) -> Dict[str, Any]:
+        """
+        Search Cluster objects and return each with its most recent member articles.
+        - Single query: member articles are resolved through the Cluster.articles reference
+        - Supports category filtering via Cluster.category
+        - Date filtering (start_date/end_date) keeps clusters whose first_published/last_published overlap
+          the range and applies to their member articles; clusters with no articles in the range are dropped
+        - Articles are sorted by recency; without a query, clusters are sorted by last_published, newest first
+        """
+        if tool_context is None:
+            raise ValueError("tool_context is required")
+
+        from weaviate.classes.query import Filter, MetadataQuery, QueryReference, Sort
+
+        client: weaviate.WeaviateClient = tool_context.state["app:weaviate_client"]
+        col = client.collections.get("Cluster")
+
+        # Basic query validation
+        q = (query or "").strip()
+
+        # Capping it incase the model suggests very high limits
+        limit = max(1, min(limit, 20))
+        articles_per_cluster = max(1, min(articles_per_cluster, 20))
+
+        start = _parse_rfc3339(_to_rfc3339_start(start_date)) if start_date else None
+        end = _parse_rfc3339(_to_rfc3339_end(end_date)) if end_date else None
+
+        # Over-fetch when dates are given, as a cluster overlapping the range may still have no articles in it
+        fetch_limit = min(limit * 3, 50) if (start or end) else limit
+
+        f: Optional[Filter] = None
+        if category:
+            f = _and(f, Filter.by_property("category").equal(category))
+        if start_date:
+            f = _and(f, Filter.by_property("last_published").greater_or_equal(_to_rfc3339_start(start_date)))
+        if end_date:
+            f = _and(f, Filter.by_property("first_published").less_or_equal(_to_rfc3339_end(end_date)))
+
+        refs = [
+            QueryReference(
+                link_on="articles",
+                return_properties=["url", "title", "author", "published", "source"],
+            )
+        ]
+
+        if q:
+            res = col.query.hybrid(
+                query=q,
+                vector=get_embedding(q, dimensions=self.embedding_dim),
+                alpha=0.7,
+                limit=fetch_limit,
+                filters=f,
+                return_references=refs,
+                return_metadata=MetadataQuery(score=True),
+            )
+        else:
+            res = col.query.fetch_objects(
+                limit=fetch_limit,
+                filters=f,
+                sort=Sort.by_property("last_published", ascending=False),
+                return_references=refs,
+                return_metadata=MetadataQuery(score=True),
+            )
+
+        out: List[Dict[str, Any]] = []
+        for o in res.objects:
+            p = o.properties or {}
+
+            articles = []
+            for a in _ref_objects(o, "articles"):
+                ap = a.properties or {}
+                published = ap.get("published")
+                if isinstance(published, str):
+                    published = _parse_rfc3339(published)
+                if (start or end) and published is None:
+                    continue
+                if start and published < start:
+                    continue
+                if end and published > end:
+                    continue
+                articles.append({**ap, "published": published})
+
+            if (start or end) and not articles:
+                continue
+
+            articles.sort(key=lambda a: a["published"] or datetime.min.replace(tzinfo=timezone.utc), reverse=True)
+
+            out.append(
+                {
+                    "cluster_id": p.get("cluster_id"),
+                    "title": p.get("title"),
+                    "summary": p.get("summary"),
+                    "category": p.get("category"),
+                    "num_articles": p.get("num_articles"),
+                    "keywords": p.get("keywords"),
+                    "score": getattr(o.metadata, "score", None),
+                    "articles_in_range": len(articles),
+                    "latest_published": articles[0]["published"] if articles else None,
+                    "articles": articles[:articles_per_cluster],
+                }
+            )
+
+        out = out[:limit]
+        return {"count": len(out), "results": out}
+
     # ---------- Query ----------
-    @traceable(name="query_agent")
+    @_traceable(name="query_agent")
     def query(self, user_id: str, session_id: str, message: str) -> str:
+        from google.genai import types
+
         content = types.Content(role="user", parts=[types.Part(text=message)])
 
         response_text = ""
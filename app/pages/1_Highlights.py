@@ -4,13 +4,17 @@ from ast import literal_eval
 from datetime import date, timedelta
 
 from app.config import settings
-from app.services import sheets_to_df
+from app.services import open_worksheet, start_warmup
+from app.sheet_cache import SheetTable
 from app.utils import render_sidebar
 
 st.set_page_config(page_title="News Highlights", layout="wide")
 st.title("News Highlights")
 render_sidebar()
 
+# Preconnect the chatbot in the background (no-op if already started)
+start_warmup()
+
 
 # Page Filters
 col1, col2, col3 = st.columns([1, 2, 1])
@@ -122,10 +126,8 @@ st.markdown(
 
 
 # Load data from Google Sheets
-@st.cache_data(ttl=600)
-def load_clusters(sheet_url: str) -> pd.DataFrame:
-    df = sheets_to_df(sheet_name="clusters_db", sheet_url=sheet_url)
-
+# Parsing only runs on rows that are new since the last refresh
+def parse_clusters(df: pd.DataFrame) -> pd.DataFrame:
     if "keywords" in df.columns:
         df["keywords"] = df["keywords"].apply(literal_eval)
 
@@ -135,10 +137,7 @@ def load_clusters(sheet_url: str) -> pd.DataFrame:
     return df
 
 
-@st.cache_data(ttl=600)
-def load_articles(sheet_url: str) -> pd.DataFrame:
-    df = sheets_to_df(sheet_name="articles_db", sheet_url=sheet_url)
-
+def parse_articles(df: pd.DataFrame) -> pd.DataFrame:
     if "published" in df.columns:
         df["published"] = pd.to_datetime(df["published"], errors="coerce", utc=True)
 
@@ -148,8 +147,20 @@ def load_articles(sheet_url: str) -> pd.DataFrame:
     return df
 
 
-clusters_df = load_clusters(settings.SHEET_URL)
-articles_df = load_articles(settings.SHEET_URL)
+# One table per process, shared by all sessions without copying (see app/sheet_cache.py).
+# The frames are read-only: filter or assign into new frames, never modify them in place.
+@st.cache_resource
+def clusters_table(sheet_url: str) -> SheetTable:
+    return SheetTable(lambda: open_worksheet("clusters_db", sheet_url), parse=parse_clusters, ttl=600)
+
+
+@st.cache_resource
+def articles_table(sheet_url: str) -> SheetTable:
+    return SheetTable(lambda: open_worksheet("articles_db", sheet_url), parse=parse_articles, ttl=600)
+
+
+clusters_df = clusters_table(settings.SHEET_URL).get()
+articles_df = articles_table(settings.SHEET_URL).get()
 
 
 # Highlights computation
@@ -161,7 +172,8 @@ def compute_highlights(
         end_date: date,
         top_n: int = 20,
 ) -> pd.DataFrame:
-    a = articles_df.copy()
+    # articles_df is shared, the filters below return new frames
+    a = articles_df
 
     # Filter category
     if category != "All" and "category" in a.columns:
@@ -177,7 +189,7 @@ def compute_highlights(
 
     # Ensure source column
     if "source" not in a.columns:
-        a["source"] = ""
+        a = a.assign(source="")
 
     # Run a few aggregations for cluster metadata
     agg = (
@@ -334,10 +346,10 @@ with right:
     # --- Choose articles scope ---
     if selected_cid:
         # Articles in selected cluster only
-        members = articles_df[articles_df["cluster_id"].astype(str) == str(selected_cid)].copy()
+        members = articles_df[articles_df["cluster_id"].astype(str) == str(selected_cid)]
     else:
         # Articles in all highlighted clusters (filtered)
-        members = articles_df[articles_df["cluster_id"].astype(str).isin(highlight_cluster_ids)].copy()
+        members = articles_df[articles_df["cluster_id"].astype(str).isin(highlight_cluster_ids)]
 
     # Date filter only (category already applied via highlights; don't double-filter)
     if "published" in members.columns:
@@ -1,8 +1,6 @@
 import streamlit as st
-from app.config import settings
-from app.services import make_weaviate_client
+from app.services import get_chatbot
 from app.utils import render_sidebar
-from app.news_chat import NewsChat
 import time
 
 
@@ -19,11 +17,7 @@ def stream_text(text: str, placeholder, delay: float = 0.03):
         time.sleep(delay)
 
 
-@st.cache_resource
-def get_chatbot() -> NewsChat:
-    client = make_weaviate_client()
-    return NewsChat(weaviate_client=client, model=settings.MODEL)
-
+# Shared with the background warm-up started on the first page load
 chatbot = get_chatbot()
 
 # Header with clear and new chat buttons
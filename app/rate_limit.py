@@ -0,0 +1,451 @@
+"""
+Process-wide adaptive rate limiting for OpenAI/LiteLLM calls.
+
+Every call to a model goes through the limiter for that model (`get_limiter`), which:
+- spaces requests with token buckets for requests per minute and tokens per minute, once it knows
+  the quota: from the RATE_LIMITS environment variable, or else from the x-ratelimit-limit-* headers
+  of the first 429. Until then only the 429s themselves slow it down
+- adapts the number of concurrent requests (AIMD): +1 per round of fast successful requests,
+  halved on a 429, and reduced by 10% when latency climbs well above its running average
+- serves waiting interactive calls (the chat) before waiting batch calls (the ingestion pipeline),
+  and keeps part of the quota and one concurrency slot out of reach of batch calls, so a batch job
+  running as fast as it can still leaves room for live users, also when they are served by another process
+
+The limiter retries 429s itself and must see them to back off, so callers must disable SDK retries
+(OpenAI(max_retries=0), LiteLLM num_retries=0). Otherwise the SDK retries a 429 on its own and the
+limiter never learns the quota was hit.
+
+Only the standard library is used (asyncio lazily), so the ingestion pipeline can share this module
+with the app and importing it stays cheap.
+"""
+import heapq
+import itertools
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+INTERACTIVE = 0
+BATCH = 1
+
+# Quotas differ by account, so there are no defaults. Requests and tokens per minute by model can be
+# set with the RATE_LIMITS environment variable, e.g. RATE_LIMITS='{"gpt-4o": [5000, 800000]}'.
+# Models without one learn their quota from the headers of the first 429.
+
+# Status codes and exception names (openai and litellm) worth retrying besides 429
+_TRANSIENT_STATUS = {408, 409, 500, 502, 503, 504}
+_TRANSIENT_ERRORS = {"APIConnectionError", "APITimeoutError", "Timeout", "ServiceUnavailableError", "InternalServerError"}
+
+
+class TokenBucket:
+    """
+    Refills at per_minute / 60 per second, holding at most burst_s seconds worth.
+    Not thread safe, RateLimiter guards it with its lock.
+    """
+
+    def __init__(self, per_minute: float, burst_s: float = 1.0):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_s)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount can be taken."""
+        self._refill(now)
+        # Requests larger than the bucket only wait for a full bucket, the level then goes negative
+        return max(0.0, (min(amount, self.capacity) - self.level) / self.rate)
+
+    def take(self, amount: float) -> None:
+        self.level -= amount
+
+    def give(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+
+@dataclass
+class Permit:
+    tokens: int
+    priority: int
+    started: float
+    # Bucket units taken per request and per token, more than 1 for batch calls
+    cost: float = 1.0
+
+
+class RateLimiter:
+    """
+    Rate limiter for one model. Use `call` / `acall` to run a request under the limiter,
+    with retries on 429s and transient errors.
+
+    Args:
+        rpm: Requests per minute, None until learned from a 429.
+        tpm: Tokens per minute, None until learned from a 429.
+        max_concurrency: Upper bound for the adaptive concurrency limit.
+        initial_concurrency: Concurrency limit to start with.
+        batch_reserve: Share of the request and token rates that batch calls leave to interactive calls.
+        latency_tolerance: Latency above this multiple of the running average counts as congestion.
+    """
+
+    def __init__(
+            self,
+            rpm: Optional[float] = None,
+            tpm: Optional[float] = None,
+            max_concurrency: int = 64,
+            initial_concurrency: int = 4,
+            batch_reserve: float = 0.2,
+            latency_tolerance: float = 2.0,
+    ):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.max_concurrency = max_concurrency
+        self.limit = float(min(initial_concurrency, max_concurrency))
+        self.batch_reserve = batch_reserve
+        self.latency_tolerance = latency_tolerance
+
+        self.in_flight = 0
+        self.latency_avg: Optional[float] = None
+        self.stats: Counter = Counter()
+
+        self._cond = threading.Condition()
+        self._waiting: list[tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._throttled_in_row = 0
+
+    # ---------- Admission ----------
+    def _cost(self, priority: int) -> float:
+        # Batch calls pay extra, so on their own they use at most (1 - batch_reserve) of the quota,
+        # also when the interactive traffic comes from another process
+        return 1.0 / (1.0 - self.batch_reserve) if priority == BATCH else 1.0
+
+    def _slots(self, priority: int) -> int:
+        slots = int(self.limit)
+        # One slot is kept free for interactive calls
+        if priority == BATCH and slots > 1:
+            slots -= 1
+        return slots
+
+    def _wait_time(self, ticket: tuple[int, int], tokens: int, now: float) -> Optional[float]:
+        """0 if the ticket can go now, seconds to wait, or None to wait for a release."""
+        if self._waiting[0] != ticket:
+            return None
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self.in_flight >= self._slots(ticket[0]):
+            return None
+        cost = self._cost(ticket[0])
+        wait = 0.0
+        if self.requests is not None:
+            wait = self.requests.wait_time(cost, now)
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens * cost, now))
+        return wait
+
+    def acquire(self, tokens: int = 0, priority: int = BATCH) -> Permit:
+        """Blocks until a request with the estimated number of tokens may be sent."""
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            waited = time.monotonic()
+            try:
+                while (wait := self._wait_time(ticket, tokens, time.monotonic())) != 0:
+                    self._cond.wait(timeout=wait)
+            except BaseException:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+                raise
+
+            heapq.heappop(self._waiting)
+            cost = self._cost(priority)
+            if self.requests is not None:
+                self.requests.take(cost)
+            if self.tokens is not None:
+                self.tokens.take(tokens * cost)
+            self.in_flight += 1
+            now = time.monotonic()
+            self.stats["wait_ms"] += int((now - waited) * 1000)
+            # The next ticket may be able to go as well
+            self._cond.notify_all()
+            return Permit(tokens=tokens, priority=priority, started=now, cost=cost)
+
+    async def acquire_async(self, tokens: int = 0, priority: int = BATCH) -> Permit:
+        """acquire for event loops, waiting in a worker thread."""
+        import asyncio
+
+        future = asyncio.get_running_loop().run_in_executor(None, self.acquire, tokens, priority)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # Hand back the permit once the waiting thread gets it
+            future.add_done_callback(lambda f: f.cancelled() or f.exception() or self.release(f.result()))
+            raise
+
+    # ---------- Feedback ----------
+    def release(
+            self,
+            permit: Permit,
+            used_tokens: Optional[int] = None,
+            throttled: bool = False,
+            retry_after: Optional[float] = None,
+            latency: Optional[float] = None,
+    ) -> None:
+        """
+        Returns the permit and adjusts the limits.
+
+        Args:
+            permit: Permit from acquire.
+            used_tokens: Tokens reported by the response, corrects the estimate taken on acquire.
+            throttled: The request got a 429.
+            retry_after: Seconds from the Retry-After header of a 429.
+            latency: Request latency, only successful requests with a latency adjust the concurrency.
+        """
+        with self._cond:
+            now = time.monotonic()
+            self.in_flight -= 1
+            if used_tokens is not None and self.tokens is not None:
+                self.tokens.give((permit.tokens - used_tokens) * permit.cost)
+
+            if throttled:
+                self.stats["throttled"] += 1
+                self._throttled_in_row += 1
+                self._decrease(0.5, now)
+                # Without Retry-After, back off 0.5s, 1s, 2s... for consecutive 429s
+                pause = retry_after if retry_after is not None else min(30.0, 0.5 * 2 ** (self._throttled_in_row - 1))
+                self._paused_until = max(self._paused_until, now + pause * random.uniform(1.0, 1.2))
+            elif latency is not None:
+                self.stats["ok"] += 1
+                self._throttled_in_row = 0
+                self._on_latency(latency, now)
+            self._cond.notify_all()
+
+    def _on_latency(self, latency: float, now: float) -> None:
+        if self.latency_avg is None:
+            self.latency_avg = latency
+        elif self.stats["ok"] > 10 and latency > self.latency_tolerance * self.latency_avg:
+            self.stats["slow"] += 1
+            self._decrease(0.9, now)
+        elif self.in_flight + 1 >= self._slots(BATCH):
+            # Additive increase, about +1 once the current limit's worth of requests succeeded.
+            # Only while the limit is what holds requests back, not the token buckets.
+            self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+        self.latency_avg += 0.1 * (latency - self.latency_avg)
+
+    def learn_limits(self, rpm: Optional[float], tpm: Optional[float]) -> None:
+        """Sets the request and token rates that aren't known yet, configured ones are kept."""
+        with self._cond:
+            if rpm and self.requests is None:
+                logger.info("Learned a quota of %d requests per minute", rpm)
+                self.requests = TokenBucket(rpm)
+            if tpm and self.tokens is None:
+                logger.info("Learned a quota of %d tokens per minute", tpm)
+                self.tokens = TokenBucket(tpm)
+
+    def _decrease(self, factor: float, now: float) -> None:
+        # Requests sent before the last decrease report the same congestion, count it once
+        if now - self._last_decrease < (self.latency_avg or 1.0):
+            return
+        self.limit = max(1.0, self.limit * factor)
+        self._last_decrease = now
+
+    # ---------- Calls ----------
+    def call(
+            self,
+            fn: Callable[..., T],
+            *args: Any,
+            priority: int = BATCH,
+            tokens: int = 0,
+            usage: Optional[Callable[[T], Optional[int]]] = None,
+            max_attempts: int = 6,
+            **kwargs: Any,
+    ) -> T:
+        """
+        Runs fn(*args, **kwargs) under the limiter, retrying 429s and transient errors.
+
+        Args:
+            fn: The request.
+            priority: INTERACTIVE or BATCH.
+            tokens: Estimated tokens of the request (prompt and completion).
+            usage: Returns the tokens actually used from fn's result.
+            max_attempts: Attempts before the last error is raised.
+        """
+        for attempt in range(1, max_attempts + 1):
+            permit = self.acquire(tokens, priority)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._failed(permit, e, attempt, max_attempts)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self.release(permit, used_tokens=_safe_usage(usage, result), latency=time.monotonic() - permit.started)
+            return result
+        raise AssertionError("unreachable")
+
+    async def acall(
+            self,
+            fn: Callable[..., Awaitable[T]],
+            *args: Any,
+            priority: int = INTERACTIVE,
+            tokens: int = 0,
+            usage: Optional[Callable[[T], Optional[int]]] = None,
+            max_attempts: int = 6,
+            **kwargs: Any,
+    ) -> T:
+        """call for coroutine functions."""
+        import asyncio
+
+        for attempt in range(1, max_attempts + 1):
+            permit = await self.acquire_async(tokens, priority)
+            try:
+                result = await fn(*args, **kwargs)
+            except asyncio.CancelledError:
+                self.release(permit)
+                raise
+            except Exception as e:
+                delay = self._failed(permit, e, attempt, max_attempts)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self.release(permit, used_tokens=_safe_usage(usage, result), latency=time.monotonic() - permit.started)
+            return result
+        raise AssertionError("unreachable")
+
+    def _failed(self, permit: Permit, error: Exception, attempt: int, max_attempts: int) -> Optional[float]:
+        """Releases the permit of a failed request. Returns the delay before retrying, or None to raise."""
+        status = _status_code(error)
+        if status == 429:
+            self.learn_limits(*_header_limits(error))
+            self.release(permit, throttled=True, retry_after=_retry_after(error))
+            # The limiter pauses all callers, no extra delay needed
+            delay = 0.0
+        else:
+            self.release(permit)
+            if status not in _TRANSIENT_STATUS and type(error).__name__ not in _TRANSIENT_ERRORS:
+                return None
+            self.stats["transient"] += 1
+            delay = min(10.0, 0.5 * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+
+        if attempt >= max_attempts:
+            return None
+        logger.info("Retrying after %s (attempt %d/%d)", type(error).__name__, attempt, max_attempts)
+        return delay
+
+
+# ---------- Helpers ----------
+def _errors(error: BaseException):
+    # instructor and litellm wrap the provider error
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    for e in _errors(error):
+        status = getattr(e, "status_code", None)
+        if isinstance(status, int):
+            return status
+        if type(e).__name__ == "RateLimitError":
+            return 429
+    return None
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    for e in _errors(error):
+        headers = getattr(getattr(e, "response", None), "headers", None)
+        if headers is not None:
+            value = headers.get("retry-after-ms")
+            if value is not None:
+                return float(value) / 1000
+            value = headers.get("retry-after")
+            try:
+                return float(value) if value is not None else None
+            except ValueError:
+                return None
+    return None
+
+
+def _header_limits(error: Exception) -> tuple[Optional[float], Optional[float]]:
+    """Requests and tokens per minute from the x-ratelimit-limit-* headers of a 429."""
+    for e in _errors(error):
+        headers = getattr(getattr(e, "response", None), "headers", None)
+        if headers is not None:
+            limits = []
+            for name in ("x-ratelimit-limit-requests", "x-ratelimit-limit-tokens"):
+                try:
+                    limits.append(float(headers.get(name)))
+                except (TypeError, ValueError):
+                    limits.append(None)
+            return limits[0], limits[1]
+    return None, None
+
+
+def _safe_usage(usage: Optional[Callable[[Any], Optional[int]]], result: Any) -> Optional[int]:
+    if usage is None:
+        return None
+    try:
+        return usage(result)
+    except Exception:
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token), good enough for the token bucket."""
+    return len(text) // 4 + 1
+
+
+def estimate_message_tokens(
+        messages: list[Any],
+        tools: Optional[list[Any]] = None,
+        max_completion_tokens: int = 500,
+) -> int:
+    """Estimated prompt tokens of chat messages and the tool schemas sent with them, plus room for the completion."""
+    chars = 0
+    for m in messages:
+        content = m.get("content") if isinstance(m, dict) else getattr(m, "content", None)
+        chars += len(content) if isinstance(content, str) else len(str(content or ""))
+    if tools:
+        chars += len(json.dumps(tools, default=str))
+    return chars // 4 + 4 * len(messages) + max_completion_tokens
+
+
+def response_tokens(response: Any) -> Optional[int]:
+    """total_tokens of an OpenAI/LiteLLM response."""
+    return response.usage.total_tokens
+
+
+_limiters: dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _model_key(model: str) -> str:
+    # "openai/gpt-4o" and "gpt-4o" share the same quota
+    return model.split("/")[-1]
+
+
+def get_limiter(model: str) -> RateLimiter:
+    """The process-wide limiter for a model, created on first use."""
+    key = _model_key(model)
+    with _limiters_lock:
+        if key not in _limiters:
+            limits = json.loads(os.getenv("RATE_LIMITS") or "{}")
+            rpm, tpm = limits.get(key, (None, None))
+            _limiters[key] = RateLimiter(rpm=rpm, tpm=tpm)
+        return _limiters[key]
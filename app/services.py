@@ -1,24 +1,44 @@
 from app.config import settings
-import pygsheets
+import logging
+import threading
+from typing import TYPE_CHECKING
 import pandas as pd
 from pathlib import Path
-import weaviate
-from weaviate.classes.init import Auth
+import streamlit as st
+
+# pygsheets and weaviate are imported lazily, so pages that don't use them don't pay for the import
+if TYPE_CHECKING:
+    import pygsheets
+    import weaviate
+    from app.news_chat import NewsChat
+
+logger = logging.getLogger(__name__)
 
 ## For local
 #FILE_PATH = Path(__file__).parent.parent.resolve()/"google_key.json"
 
 
-def sheets_to_df(sheet_name: str, sheet_url: str) -> pd.DataFrame:
+def open_worksheet(sheet_name: str, sheet_url: str) -> "pygsheets.Worksheet":
     """
-    Get a Google sheet as a pandas dataframe
+    Open a Google sheet tab
     """
+    import pygsheets
+
     gc = pygsheets.authorize(service_account_file=settings.GOOGLE_KEY_PATH)
     sh = gc.open_by_url(sheet_url)
-    wks = sh.worksheet_by_title(sheet_name)
-    return wks.get_as_df()
+    return sh.worksheet_by_title(sheet_name)
+
+
+def sheets_to_df(sheet_name: str, sheet_url: str) -> pd.DataFrame:
+    """
+    Get a Google sheet as a pandas dataframe
+    """
+    return open_worksheet(sheet_name, sheet_url).get_as_df()
+
+def make_weaviate_client() -> "weaviate.WeaviateClient":
+    import weaviate
+    from weaviate.classes.init import Auth
 
-def make_weaviate_client():
     # Load Weaviate credentials from environment variables
     weaviate_url = settings.WEAVIATE_URL
     weaviate_api_key = settings.WEAVIATE_API_KEY
@@ -28,4 +48,35 @@ def make_weaviate_client():
         cluster_url=weaviate_url,
         auth_credentials=Auth.api_key(weaviate_api_key),
     )
-    return w_client
\ No newline at end of file
+    return w_client
+
+
+@st.cache_resource
+def get_chatbot() -> "NewsChat":
+    """
+    Shared chatbot for the process (Weaviate connection, OpenAI client and ADK runner).
+    Concurrent callers wait for the first one, so a running warm-up is reused rather than duplicated.
+    """
+    from app.news_chat import NewsChat
+
+    client = make_weaviate_client()
+    return NewsChat(weaviate_client=client, model=settings.MODEL, embedding_dim=settings.EMBEDDING_DIM)
+
+
+def _warm_up() -> None:
+    try:
+        get_chatbot().warm_up()
+    except Exception:
+        # Warm-up is best effort, the Chatbot page will surface real errors on first use
+        logger.exception("Chatbot warm-up failed")
+
+
+@st.cache_resource
+def start_warmup() -> threading.Thread:
+    """
+    Import the chat dependencies, connect and prime the clients in the background.
+    Runs once per server process, on the first page load.
+    """
+    thread = threading.Thread(target=_warm_up, name="chatbot-warmup", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,157 @@
+"""
+Process-wide, incrementally refreshed copies of Google Sheets tabs.
+
+A SheetTable holds one parsed DataFrame that every session reads directly, instead of the
+deserialised copy per rerun that st.cache_data returns. Frames are never modified after they are
+published: a refresh builds a new frame and swaps it in, so a session that is still rendering
+keeps a consistent snapshot. Callers must treat the frames as read-only.
+
+Sheets are appended to, so a refresh only fetches the header and the rows below the last loaded
+row (the watermark) and parses those. If the header changed (e.g. a new column) or the watermark
+row no longer matches, the sheet was rewritten and is loaded in full again.
+"""
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Optional
+
+import pandas as pd
+
+if TYPE_CHECKING:
+    import pygsheets
+
+logger = logging.getLogger(__name__)
+
+
+def _strip_trailing_empty(row: list) -> list:
+    end = len(row)
+    while end and row[end - 1] == "":
+        end -= 1
+    return row[:end]
+
+
+class SheetTable:
+    """
+    A worksheet held in memory as one shared DataFrame.
+
+    Args:
+        open_worksheet: Returns the pygsheets worksheet, called once on first load.
+        parse: Turns raw rows (as read by Worksheet.get_as_df) into the final frame. Only called with new rows.
+        ttl: Seconds between checks for new rows.
+    """
+
+    def __init__(
+            self,
+            open_worksheet: Callable[[], "pygsheets.Worksheet"],
+            parse: Callable[[pd.DataFrame], pd.DataFrame],
+            ttl: float = 600,
+    ):
+        self.open_worksheet = open_worksheet
+        self.parse = parse
+        self.ttl = ttl
+
+        self._wks: Optional["pygsheets.Worksheet"] = None
+        self._lock = threading.Lock()
+        self._df: Optional[pd.DataFrame] = None
+        self._header: list[str] = []
+        # Watermark: number of data rows loaded and the raw values of the last one
+        self._num_rows = 0
+        self._last_row: list = []
+        self._checked = 0.0
+
+    def get(self) -> pd.DataFrame:
+        """
+        The current frame, refreshed if it is older than ttl. Read-only, shared with every session.
+        While another session refreshes, the previous frame is returned instead of waiting.
+        """
+        if self._df is not None and time.monotonic() - self._checked < self.ttl:
+            return self._df
+
+        # Only the first load makes callers wait
+        if not self._lock.acquire(blocking=self._df is None):
+            return self._df
+        try:
+            if self._df is None or time.monotonic() - self._checked >= self.ttl:
+                self._refresh()
+        finally:
+            self._lock.release()
+        return self._df
+
+    def refresh(self) -> pd.DataFrame:
+        """Checks for new rows now, regardless of ttl."""
+        with self._lock:
+            self._refresh()
+        return self._df
+
+    def _refresh(self) -> None:
+        try:
+            if self._df is None:
+                self._load_all()
+            else:
+                self._load_new_rows()
+        except Exception:
+            if self._df is None:
+                raise
+            # Keep serving the previous frame and try again after ttl
+            logger.exception("Refreshing sheet failed")
+        finally:
+            self._checked = time.monotonic()
+
+    def _rows_to_df(self, rows: list[list]) -> pd.DataFrame:
+        # Same conversion as Worksheet.get_as_df, so incremental rows get the same types as a full load
+        from pygsheets.utils import numericise_all
+
+        width = len(self._header)
+        rows = [numericise_all((row + [""] * width)[:width], "") for row in rows]
+        return self.parse(pd.DataFrame(rows, columns=self._header))
+
+    def _publish(self, df: pd.DataFrame, num_rows: int, last_row: list) -> None:
+        # parse may drop rows, so the watermark counts sheet rows rather than frame rows
+        self._df = df
+        self._num_rows = num_rows
+        self._last_row = _strip_trailing_empty(last_row)
+
+    def _load_all(self) -> None:
+        if self._wks is None:
+            self._wks = self.open_worksheet()
+
+        values = self._wks.get_all_values(
+            returnas="matrix", include_tailing_empty=False, include_tailing_empty_rows=False
+        )
+        self._header = _strip_trailing_empty(values[0]) if values else []
+        rows = values[1:]
+        self._publish(self._rows_to_df(rows), len(rows), rows[-1] if rows else [])
+        logger.info("Loaded %d rows from sheet '%s'", len(rows), self._wks.title)
+
+    def _load_new_rows(self) -> None:
+        # Worksheet size may have changed since it was opened
+        self._wks.refresh()
+
+        # Header is row 1, so the last loaded row is row num_rows + 1. Fetch both again, in one
+        # request and over all columns, to check the sheet was only appended to, together with
+        # everything below the last loaded row.
+        watermark = self._num_rows + 1
+        if self._num_rows == 0 or self._wks.rows < watermark:
+            self._load_all()
+            return
+
+        header, values = self._wks.get_values_batch([
+            ((1, 1), (1, self._wks.cols)),
+            ((watermark, 1), (self._wks.rows, self._wks.cols)),
+        ])
+        if _strip_trailing_empty(header[0]) != self._header:
+            logger.info("Header of sheet '%s' changed, reloading it", self._wks.title)
+            self._load_all()
+            return
+        if not values or _strip_trailing_empty(values[0]) != self._last_row:
+            logger.info("Sheet '%s' was rewritten, reloading it", self._wks.title)
+            self._load_all()
+            return
+
+        rows = values[1:]
+        if not rows:
+            return
+
+        new = self._rows_to_df(rows)
+        self._publish(pd.concat([self._df, new], ignore_index=True), self._num_rows + len(rows), rows[-1])
+        logger.info("Loaded %d new rows from sheet '%s'", len(rows), self._wks.title)
@@ -0,0 +1,98 @@
+"""
+Cold start benchmark for the Chatbot page.
+
+Measures, each in a fresh interpreter:
+- import: time to import app.news_chat, against importing its heavy dependencies eagerly
+  (what the module used to do at load time)
+- first_response: time from the first Chatbot page visit to the first answer,
+  without warm-up (cold) and after the background warm-up has finished (warm)
+
+The first_response mode needs the same .env as the app (OpenAI and Weaviate credentials).
+
+Usage:
+    python -m benchmarks.cold_start import --runs 5
+    python -m benchmarks.cold_start first_response --message "Top highlights for Sports"
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.resolve()
+
+EAGER_IMPORTS = (
+    "import google.adk.agents, google.adk.tools, google.adk.runners, google.adk.sessions, "
+    "google.adk.models.lite_llm, google.genai.types, langsmith, weaviate, openai"
+)
+LAZY_IMPORTS = "import app.news_chat"
+
+FIRST_RESPONSE = """
+import time
+t0 = time.perf_counter()
+from app.services import make_weaviate_client
+from app.news_chat import NewsChat
+from app.config import settings
+bot = NewsChat(weaviate_client=make_weaviate_client(), model=settings.MODEL, embedding_dim=settings.EMBEDDING_DIM)
+if {warm}:
+    bot.warm_up()
+    # The warm-up runs in the background before the user reaches the page, so it is excluded
+    t0 = time.perf_counter()
+sid = bot.create_session(user_id="benchmark")
+bot.query(user_id="benchmark", session_id=sid, message={message!r})
+print(time.perf_counter() - t0)
+bot.close()
+"""
+
+
+def _time_subprocess(code: str) -> float:
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True)
+    return time.perf_counter() - t0
+
+
+def _run_code(code: str) -> float:
+    res = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True, text=True)
+    return float(res.stdout.strip().splitlines()[-1])
+
+
+def _report(label: str, timings: list[float]) -> None:
+    print(f"{label:<24} median={statistics.median(timings):7.3f}s  min={min(timings):7.3f}s  runs={len(timings)}")
+
+
+def bench_import(runs: int) -> None:
+    baseline = [_time_subprocess("pass") for _ in range(runs)]
+    eager = [_time_subprocess(EAGER_IMPORTS) for _ in range(runs)]
+    lazy = [_time_subprocess(LAZY_IMPORTS) for _ in range(runs)]
+
+    _report("interpreter only", baseline)
+    _report("eager imports", eager)
+    _report("app.news_chat (lazy)", lazy)
+    print(f"import time saved: {statistics.median(eager) - statistics.median(lazy):.3f}s")
+
+
+def bench_first_response(runs: int, message: str) -> None:
+    cold = [_run_code(FIRST_RESPONSE.format(warm=False, message=message)) for _ in range(runs)]
+    warm = [_run_code(FIRST_RESPONSE.format(warm=True, message=message)) for _ in range(runs)]
+
+    _report("first response (cold)", cold)
+    _report("first response (warm)", warm)
+    print(f"first response time saved: {statistics.median(cold) - statistics.median(warm):.3f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", choices=["import", "first_response"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--message", default="Top highlights for Sports")
+    args = parser.parse_args()
+
+    if args.mode == "import":
+        bench_import(args.runs)
+    else:
+        bench_first_response(args.runs, args.message)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Data cache benchmark for the Highlights page.
+
+Runs app/pages/1_Highlights.py with streamlit's AppTest, once with the previous loaders
+(st.cache_data(ttl=600) around a full sheet download and parse) and once as it is (the shared
+SheetTable cache), on synthetic clusters_db/articles_db sheets served by an in-memory worksheet,
+so no Google credentials are needed. The rest of the page (compute_highlights, the member
+filtering and formatting, rendering) is the same in both. Measures:
+- rerun: time of a page rerun with the data cached
+- peak memory: memory a rerun allocates on top of the cached data, which concurrent sessions multiply
+- rerun after ttl: time of the first rerun once the cache expired and --new-rows articles were appended
+  (full reload before, incremental after)
+
+Usage:
+    python -m benchmarks.highlights_cache --articles 20000 --clusters 2000
+"""
+import argparse
+import gc
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+import app.sheet_cache
+from app.sheet_cache import SheetTable
+
+PAGE = Path(__file__).resolve().parent.parent / "app" / "pages" / "1_Highlights.py"
+
+CATEGORIES = ["Music", "Finance", "Lifestyle", "Sports"]
+SOURCES = ["SMH", "SBS", "The Guardian", "ESPN", "ABC", "Canberra Times"]
+
+# The page's loaders before the shared cache, swapped in for the SheetTable ones
+SHARED_LOADERS = """\
+clusters_df = clusters_table(settings.SHEET_URL).get()
+articles_df = articles_table(settings.SHEET_URL).get()
+"""
+CACHE_DATA_LOADERS = """\
+from app.services import sheets_to_df
+
+
+@st.cache_data(ttl=600)
+def load_clusters(sheet_url: str) -> pd.DataFrame:
+    return parse_clusters(sheets_to_df(sheet_name="clusters_db", sheet_url=sheet_url))
+
+
+@st.cache_data(ttl=600)
+def load_articles(sheet_url: str) -> pd.DataFrame:
+    return parse_articles(sheets_to_df(sheet_name="articles_db", sheet_url=sheet_url))
+
+
+clusters_df = load_clusters(settings.SHEET_URL)
+articles_df = load_articles(settings.SHEET_URL)
+"""
+
+
+class FakeWorksheet:
+    """The subset of pygsheets.Worksheet used by the page, returning formatted (string) values."""
+
+    def __init__(self, title: str, values: list[list[str]]):
+        self.title = title
+        self.values = values
+        self.rows = len(values)
+        self.cols = len(values[0])
+
+    def refresh(self, update_grid=False):
+        self.rows = len(self.values)
+
+    def get_all_values(self, **kwargs):
+        return [list(r) for r in self.values]
+
+    def get_values_batch(self, ranges, **kwargs):
+        # Like the Sheets API, an empty range comes back as [[""]]
+        return [
+            [list(r[start[1] - 1:end[1]]) for r in self.values[start[0] - 1:end[0]]] or [[""]]
+            for start, end in ranges
+        ]
+
+    def get_as_df(self):
+        from pygsheets.utils import numericise_all
+
+        values = [numericise_all(list(r), "") for r in self.values]
+        return pd.DataFrame(values[1:], columns=values[0])
+
+
+class RecordingSheetTable(SheetTable):
+    """SheetTable that keeps track of its instances, so the benchmark can refresh them."""
+
+    instances: list[SheetTable] = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.instances.append(self)
+
+
+def _embedding(rng: random.Random, dim: int) -> str:
+    return str([round(rng.uniform(-0.1, 0.1), 6) for _ in range(dim)])
+
+
+def make_sheets(n_articles: int, n_clusters: int, embedding_dim: int, seed: int = 0) -> dict[str, FakeWorksheet]:
+    rng = random.Random(seed)
+    clusters = [["cluster_id", "category", "num_articles", "keywords", "title", "summary", "embedding"]]
+    for i in range(n_clusters):
+        keywords = [f"keyword{rng.randrange(500)}" for _ in range(10)]
+        clusters.append([
+            f"Sports_{i}", rng.choice(CATEGORIES), str(rng.randint(2, 30)), str(keywords),
+            f"Story {i} title", "Summary of the story. " * 5, _embedding(rng, embedding_dim),
+        ])
+
+    articles = [["url", "source", "title", "author", "published", "summary", "category", "cluster_id", "embedding"]]
+    for i in range(n_articles):
+        articles.append(make_article(rng, i, n_clusters, embedding_dim))
+    return {"clusters_db": FakeWorksheet("clusters_db", clusters), "articles_db": FakeWorksheet("articles_db", articles)}
+
+
+def make_article(rng: random.Random, i: int, n_clusters: int, embedding_dim: int) -> list[str]:
+    # Spread over the last 18 days, so the page's default 14 day range holds most of them
+    start = pd.Timestamp.now(tz="UTC").normalize() - pd.Timedelta(days=17)
+    published = start + pd.Timedelta(minutes=rng.randrange(60 * 24 * 18))
+    return [
+        f"https://example.com/news/{i}", rng.choice(SOURCES), f"Article {i} title", "Staff reporter",
+        published.strftime("%Y-%m-%d %H:%M:%S+00:00"), "Article summary text. " * 6,
+        rng.choice(CATEGORIES), f"Sports_{rng.randrange(n_clusters)}", _embedding(rng, embedding_dim),
+    ]
+
+
+def page_script(loaders: str, directory: Path) -> Path:
+    source = PAGE.read_text()
+    if loaders == "cache_data":
+        if SHARED_LOADERS not in source:
+            raise RuntimeError(f"Loaders not found in {PAGE}, update SHARED_LOADERS")
+        source = source.replace(SHARED_LOADERS, CACHE_DATA_LOADERS)
+    path = directory / f"highlights_{loaders}.py"
+    path.write_text(source)
+    return path
+
+
+def _run(at) -> None:
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+
+def measure(name: str, loaders: str, directory: Path, args: argparse.Namespace) -> dict[str, float]:
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    sheets = make_sheets(args.articles, args.clusters, args.embedding_dim)
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    RecordingSheetTable.instances.clear()
+
+    with (
+        mock.patch("app.services.open_worksheet", lambda sheet_name, sheet_url: sheets[sheet_name]),
+        mock.patch("app.services.start_warmup", lambda: None),
+        # page_link needs the multipage app around the page
+        mock.patch("app.utils.render_sidebar", lambda: None),
+        mock.patch.object(app.sheet_cache, "SheetTable", RecordingSheetTable),
+    ):
+        at = AppTest.from_file(str(page_script(loaders, directory)), default_timeout=120)
+        # First run loads the sheets
+        _run(at)
+
+        times = []
+        for _ in range(args.runs):
+            t0 = time.perf_counter()
+            _run(at)
+            times.append(time.perf_counter() - t0)
+
+        gc.collect()
+        tracemalloc.start()
+        _run(at)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        rng = random.Random(1)
+        articles = sheets["articles_db"].values
+        n = len(articles) - 1
+        articles.extend(make_article(rng, n + i, args.clusters, args.embedding_dim) for i in range(args.new_rows))
+        t0 = time.perf_counter()
+        # What the first rerun after the ttl does
+        if loaders == "cache_data":
+            st.cache_data.clear()
+        for table in RecordingSheetTable.instances:
+            table.refresh()
+        _run(at)
+        expired_s = time.perf_counter() - t0
+
+    return {
+        "name": name,
+        "rerun_ms": statistics.median(times) * 1000,
+        "peak_mb": peak / 2**20,
+        "expired_ms": expired_s * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--clusters", type=int, default=2000)
+    parser.add_argument("--embedding-dim", type=int, default=64, help="Values in the embedding column of the sheets")
+    parser.add_argument("--new-rows", type=int, default=200, help="Articles appended before the cache expires")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    # app.config requires these, nothing connects to them
+    for name in ("SHEET_URL", "WEAVIATE_URL", "WEAVIATE_API_KEY"):
+        os.environ.setdefault(name, "unused")
+    logging.getLogger("app.sheet_cache").setLevel(logging.WARNING)
+    from streamlit.logger import set_log_level
+
+    set_log_level("error")
+
+    print(f"{args.articles} articles, {args.clusters} clusters, {args.new_rows} new rows, {args.runs} reruns")
+    with tempfile.TemporaryDirectory() as directory:
+        results = [
+            measure("st.cache_data (before)", "cache_data", Path(directory), args),
+            measure("SheetTable (after)", "shared", Path(directory), args),
+        ]
+    print(f"{'':<24} {'rerun':>10} {'peak memory':>12} {'rerun after ttl':>16}")
+    for r in results:
+        print(f"{r['name']:<24} {r['rerun_ms']:>8.1f}ms {r['peak_mb']:>9.1f}MiB {r['expired_ms']:>14.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
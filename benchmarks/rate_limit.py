@@ -0,0 +1,140 @@
+"""
+Rate limiter benchmark against a simulated provider.
+
+Batch threads (the ingestion pipeline) send requests as fast as the limiter lets them while one chat
+user sends a request every --chat-interval seconds. The simulated provider answers with a latency that
+grows with its load and returns 429s above its quota, so no API key is needed. Scenarios:
+- quota: the provider allows --rpm requests per minute, configured in the limiter (RATE_LIMITS)
+- learned quota: the same provider, the limiter learns the quota from the headers of the first 429
+- concurrency: the provider allows --max-concurrency requests in flight (and a high rpm)
+
+For each scenario it reports the batch throughput, the 429s, where the adaptive concurrency limit
+settled and how long chat requests took, once with the chat in the same process as the batch job
+(sharing its limiter) and once with the chat in another process (its own limiter, same provider).
+
+Usage:
+    python -m benchmarks.rate_limit --seconds 30 --batch-threads 32
+"""
+import argparse
+import logging
+import statistics
+import threading
+import time
+from typing import Optional
+
+from app.rate_limit import BATCH, INTERACTIVE, RateLimiter, TokenBucket
+
+
+class SimulatedResponse:
+    def __init__(self, headers: dict[str, str]):
+        self.headers = headers
+
+
+class SimulatedRateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, rpm: float):
+        super().__init__()
+        self.response = SimulatedResponse({"x-ratelimit-limit-requests": str(int(rpm))})
+
+
+class SimulatedProvider:
+    """Answers after base_latency plus load_latency per request in flight, or raises a 429 above its limits."""
+
+    def __init__(self, rpm: float, max_concurrency: int, base_latency: float = 0.2, load_latency: float = 0.01):
+        self.rpm = rpm
+        self.quota = TokenBucket(rpm, burst_s=2.0)
+        self.max_concurrency = max_concurrency
+        self.base_latency = base_latency
+        self.load_latency = load_latency
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self) -> str:
+        with self._lock:
+            if self.quota.wait_time(1, time.monotonic()) > 0 or self.in_flight >= self.max_concurrency:
+                raise SimulatedRateLimitError(self.rpm)
+            self.quota.take(1)
+            self.in_flight += 1
+            latency = self.base_latency + self.load_latency * self.in_flight
+        time.sleep(latency)
+        with self._lock:
+            self.in_flight -= 1
+        return "ok"
+
+
+def run(provider: SimulatedProvider, rpm: Optional[float], shared: bool, args: argparse.Namespace) -> dict:
+    batch_limiter = RateLimiter(rpm=rpm)
+    chat_limiter = batch_limiter if shared else RateLimiter(rpm=rpm)
+    stop = time.monotonic() + args.seconds
+    batch_done = [0]
+    chat_times: list[float] = []
+    chat_failed = [0]
+
+    def batch():
+        while time.monotonic() < stop:
+            batch_limiter.call(provider, priority=BATCH)
+            # Threads still queued at the end finish after stop, only count the window
+            if time.monotonic() < stop:
+                batch_done[0] += 1
+
+    def chat():
+        while time.monotonic() < stop:
+            t0 = time.monotonic()
+            try:
+                chat_limiter.call(provider, priority=INTERACTIVE)
+                chat_times.append(time.monotonic() - t0)
+            except SimulatedRateLimitError:
+                chat_failed[0] += 1
+            time.sleep(args.chat_interval)
+
+    threads = [threading.Thread(target=batch) for _ in range(args.batch_threads)] + [threading.Thread(target=chat)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    throttled = batch_limiter.stats["throttled"] + (0 if shared else chat_limiter.stats["throttled"])
+    return {
+        "batch_rps": batch_done[0] / args.seconds,
+        "throttled": throttled,
+        "limit": batch_limiter.limit,
+        "chat_p50": statistics.median(chat_times) if chat_times else float("nan"),
+        "chat_max": max(chat_times, default=float("nan")),
+        "chat_failed": chat_failed[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--batch-threads", type=int, default=32)
+    parser.add_argument("--chat-interval", type=float, default=1.0, help="Seconds between chat requests")
+    parser.add_argument("--rpm", type=float, default=600, help="Provider quota in the quota scenario")
+    parser.add_argument("--max-concurrency", type=int, default=8, help="Provider cap in the concurrency scenario")
+    args = parser.parse_args()
+
+    logging.getLogger("app.rate_limit").setLevel(logging.WARNING)
+
+    # (name, provider rpm, provider concurrency, rpm configured in the limiter)
+    scenarios = [
+        ("quota", args.rpm, 10**6, args.rpm),
+        ("learned quota", args.rpm, 10**6, None),
+        ("concurrency", 100 * args.rpm, args.max_concurrency, 100 * args.rpm),
+    ]
+    print(f"{args.batch_threads} batch threads, 1 chat request every {args.chat_interval:g}s, {args.seconds:g}s per run")
+    print(f"quota: {args.rpm / 60:.1f} requests/s, concurrency: {args.max_concurrency} requests in flight")
+    print(f"{'':<34} {'batch':>9} {'429s':>6} {'limit':>6} {'chat p50':>9} {'chat max':>9} {'chat failed':>12}")
+    for name, rpm, max_concurrency, configured_rpm in scenarios:
+        for shared in (True, False):
+            provider = SimulatedProvider(rpm, max_concurrency)
+            r = run(provider, configured_rpm, shared, args)
+            label = f"{name} ({'same process' if shared else 'other process'})"
+            print(
+                f"{label:<34} {r['batch_rps']:>6.1f}r/s {r['throttled']:>6} {r['limit']:>6.1f} "
+                f"{r['chat_p50']:>8.2f}s {r['chat_max']:>8.2f}s {r['chat_failed']:>12}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Command line entry point for the ingestion pipeline.
+
+    python -m pipeline run --run-dir runs/2026-10-19
+    python -m pipeline run --local                       # offline, against local stand-ins
+
+Re-running with the same --run-dir resumes a failed run from its checkpoints.
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+from dataclasses import asdict
+from datetime import date
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from pipeline.runner import PipelineError, Stage, format_stats, run_pipeline
+from pipeline.stages import (
+    ClassifyStage,
+    ClusterStage,
+    CleanStage,
+    EmbedStage,
+    FetchStage,
+    LoadStage,
+    SummarizeStage,
+)
+
+logger = logging.getLogger("pipeline")
+
+DEFAULT_WORKERS = {"fetch": 8, "clean": 1, "classify": 8, "embed": 4, "summarize": 8}
+
+# Options that change the chunking or content of checkpoints, so a run can only resume with the same values
+RESUME_OPTIONS = (
+    "local", "feeds_per_chunk", "limit_per_feed", "dedupe_threshold", "embedding_dim", "cluster_threshold", "chunk_size",
+)
+
+
+def _parse_workers(values: list[str]) -> dict[str, int]:
+    workers = dict(DEFAULT_WORKERS)
+    for value in values:
+        stage, _, n = value.partition("=")
+        if stage not in DEFAULT_WORKERS or not n.isdigit() or int(n) < 1:
+            raise argparse.ArgumentTypeError(f"Invalid --workers '{value}', expected <stage>=<n> for one of {list(DEFAULT_WORKERS)}")
+        workers[stage] = int(n)
+    return workers
+
+
+def build_stages(args: argparse.Namespace, workers: dict[str, int]) -> tuple[list[Stage], dict[str, list[str]]]:
+    """
+    Builds the stages with either the real services or the local stand-ins.
+    """
+    if args.local:
+        from pipeline.local import (
+            LOCAL_FEEDS,
+            ExtractiveSummarizer,
+            HashingEmbedder,
+            KeywordClassifier,
+            LocalVectorStore,
+            TermFrequencyKeywords,
+        )
+
+        feeds = LOCAL_FEEDS
+        classifier = KeywordClassifier()
+        embedder = HashingEmbedder(dimensions=args.embedding_dim)
+        keywords = TermFrequencyKeywords()
+        summarizer = ExtractiveSummarizer()
+        sink = LocalVectorStore(args.run_dir / "store")
+    else:
+        from pipeline.clustering import SpacyKeywordExtractor
+        from pipeline.embeddings import OpenAIEmbedder
+        from pipeline.fetch import RSS_FEEDS
+        from pipeline.llm import LLMClassifier, LLMSummarizer
+        from pipeline.load import WeaviateSink
+
+        feeds = RSS_FEEDS
+        classifier = LLMClassifier()
+        embedder = OpenAIEmbedder(dimensions=args.embedding_dim)
+        keywords = SpacyKeywordExtractor()
+        summarizer = LLMSummarizer()
+        sink = WeaviateSink()
+
+    stages = [
+        FetchStage(workers=workers["fetch"], limit_per_feed=args.limit_per_feed),
+        CleanStage(workers=workers["clean"], threshold=args.dedupe_threshold),
+        ClassifyStage(classifier, workers=workers["classify"]),
+        EmbedStage(embedder, workers=workers["embed"]),
+        ClusterStage(keywords, threshold=args.cluster_threshold),
+        SummarizeStage(summarizer, embedder, workers=workers["summarize"]),
+        LoadStage(sink),
+    ]
+    return stages, feeds
+
+
+def _check_resume(run_dir: Path, options: dict) -> None:
+    path = run_dir / "run.json"
+    if path.exists():
+        previous = json.loads(path.read_text())
+        changed = {k: (previous.get(k), options[k]) for k in RESUME_OPTIONS if previous.get(k) != options[k]}
+        if changed:
+            details = ", ".join(f"{k}: {old} -> {new}" for k, (old, new) in changed.items())
+            raise SystemExit(f"Cannot resume {run_dir} with different options ({details}). Use --fresh to start over.")
+    run_dir.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(options, indent=2))
+
+
+def run(args: argparse.Namespace) -> int:
+    workers = _parse_workers(args.workers)
+
+    if args.fresh:
+        shutil.rmtree(args.run_dir, ignore_errors=True)
+
+    options = {
+        "local": args.local,
+        "feeds_per_chunk": args.feeds_per_chunk,
+        "limit_per_feed": args.limit_per_feed,
+        "dedupe_threshold": args.dedupe_threshold,
+        "embedding_dim": args.embedding_dim,
+        "cluster_threshold": args.cluster_threshold,
+        "chunk_size": args.chunk_size,
+        "workers": workers,
+    }
+    _check_resume(args.run_dir, options)
+
+    stages, feeds = build_stages(args, workers)
+    feed_records = [{"source": source, "feed_url": url} for source, urls in feeds.items() for url in urls]
+    source = (feed_records[i:i + args.feeds_per_chunk] for i in range(0, len(feed_records), args.feeds_per_chunk))
+
+    t0 = time.perf_counter()
+    try:
+        stats = run_pipeline(stages, source, args.run_dir, chunk_size=args.chunk_size, queue_size=args.queue_size)
+    except PipelineError as e:
+        logger.error("%s. Re-run with --run-dir %s to resume.", e, args.run_dir)
+        return 1
+    total = time.perf_counter() - t0
+
+    print(format_stats(stats))
+    print(f"total: {total:.2f}s")
+    (args.run_dir / "timings.json").write_text(
+        json.dumps({"total_s": total, "stages": [asdict(s) for s in stats]}, indent=2)
+    )
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(prog="python -m pipeline", description="NewsChat ingestion pipeline")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("run", help="Run (or resume) the pipeline: fetch, clean, classify, embed, cluster, summarize, load")
+    p.add_argument("--run-dir", type=Path, default=None, help="Checkpoint directory, defaults to runs/<today> (runs/local-<today> with --local)")
+    p.add_argument("--local", action="store_true", help="Use local stand-ins instead of RSS, OpenAI and Weaviate")
+    p.add_argument("--fresh", action="store_true", help="Discard existing checkpoints in --run-dir")
+    p.add_argument("--feeds-per-chunk", type=int, default=4, help="Feeds per input chunk, which bounds the article chunk size")
+    p.add_argument("--limit-per-feed", type=int, default=40)
+    p.add_argument("--chunk-size", type=int, default=16, help="Clusters per chunk after the cluster stage")
+    p.add_argument("--queue-size", type=int, default=4, help="Chunks buffered between two stages")
+    p.add_argument("--workers", nargs="*", default=[], metavar="STAGE=N", help=f"Concurrency per stage, defaults: {DEFAULT_WORKERS}")
+    p.add_argument("--dedupe-threshold", type=float, default=0.8, help="MinHash similarity for near-duplicate articles")
+    p.add_argument("--cluster-threshold", type=float, default=0.7, help="Cosine similarity for story clusters")
+    p.add_argument(
+        "--embedding-dim",
+        type=int,
+        default=int(os.getenv("EMBEDDING_DIM")) if os.getenv("EMBEDDING_DIM") else None,
+        help="Shortened embedding dimension, defaults to EMBEDDING_DIM or the full 1536",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(threadName)s: %(message)s")
+
+    if args.run_dir is None:
+        args.run_dir = Path("runs") / f"{'local-' if args.local else ''}{date.today().isoformat()}"
+
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
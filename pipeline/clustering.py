@@ -0,0 +1,257 @@
+"""
+Story clustering and keyword extraction (ported from notebooks/03_clustering.ipynb).
+"""
+import re
+from collections import Counter
+from typing import Any, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import NearestNeighbors
+
+
+# ----------------------------
+# Union-Find (connected components)
+# ----------------------------
+def connected_components(n: int, edges: list[Tuple[int, int]]) -> list[list[int]]:
+    parent = list(range(n))
+    rank = [0] * n
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(a: int, b: int) -> None:
+        ra, rb = find(a), find(b)
+        if ra == rb:
+            return
+        if rank[ra] < rank[rb]:
+            parent[ra] = rb
+        elif rank[ra] > rank[rb]:
+            parent[rb] = ra
+        else:
+            parent[rb] = ra
+            rank[ra] += 1
+
+    for i, j in edges:
+        union(i, j)
+
+    comps = {}
+    for i in range(n):
+        root = find(i)
+        comps.setdefault(root, []).append(i)
+
+    return list(comps.values())
+
+
+# ----------------------------
+# Graph dedupe for one category
+# ----------------------------
+def graph_dedupe_category(
+    X: np.ndarray,
+    threshold: float,
+    k: int,
+) -> list[list[int]]:
+    n = X.shape[0]
+    if n < 2:
+        return []
+
+    nn = NearestNeighbors(
+        n_neighbors=min(k + 1, n),
+        metric="cosine",
+    )
+
+    nn.fit(X)
+    dists, nbrs = nn.kneighbors(X)
+
+    edges = set()
+
+    for i in range(n):
+        for dist, j in zip(dists[i, 1:], nbrs[i, 1:]):  # skip self
+            sim = 1.0 - float(dist)
+            if sim >= threshold:
+                j = int(j)
+                a, b = (i, j) if i < j else (j, i)
+                edges.add((a, b))
+
+    clusters = connected_components(n, list(edges))
+    return [c for c in clusters if len(c) >= 2]
+
+
+# ----------------------------
+# Full pipeline over all categories
+# ----------------------------
+def dedupe_all_categories(
+    df: pd.DataFrame,
+    threshold: float = 0.7,
+    k: int = 15,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Input df columns:
+    (url, author, published, category, source, title, summary, embedding)
+
+    Returns:
+    1) cluster_df columns: [cluster_id, num_articles, url, article_summary]
+       (one row per article that belongs to a cluster)
+    2) clustered_articles_df: original df filtered to only clustered articles,
+       with cluster_id attached
+    """
+
+    cluster_rows = []
+    category_cluster_counters: dict[str, int] = {}
+
+    # Keep original row index so we can map cluster_id back
+    df = df.reset_index(drop=False).rename(columns={"index": "_row_index"})
+
+    for category, df_cat in df.groupby("category", sort=False):
+        df_cat = df_cat.reset_index(drop=True)
+
+        # per-category cluster counter
+        category_cluster_counters.setdefault(category, 0)
+
+        X = np.vstack(df_cat["embedding"].values)
+        clusters = graph_dedupe_category(
+            X=X,
+            threshold=threshold,
+            k=min(k, len(df_cat) - 1),
+        )
+
+        for cluster in clusters:
+            cid = category_cluster_counters[category]
+            cluster_id = f"{category}_{cid}"
+            category_cluster_counters[category] += 1
+
+            cluster_size = len(cluster)
+
+            for local_i in cluster:
+                row = df_cat.iloc[local_i]
+                cluster_rows.append({
+                    "cluster_id": cluster_id,
+                    "category": category,
+                    "num_articles": cluster_size,
+                    "url": row["url"],
+                    "article_summary": row["summary"],
+                    "_row_index": int(row["_row_index"]),
+                })
+
+    cluster_df = pd.DataFrame(cluster_rows, columns=["cluster_id", "category", "num_articles", "url", "article_summary", "_row_index"])
+
+    if cluster_df.empty:
+        # return empty frames with expected schema
+        empty_cluster_df = pd.DataFrame(columns=["cluster_id", "category", "num_articles", "url", "article_summary"])
+        empty_clustered_articles_df = df.iloc[0:0].drop(columns=["_row_index"]).copy()
+        empty_clustered_articles_df["cluster_id"] = None
+        return empty_cluster_df, empty_clustered_articles_df
+
+    # clustered_articles_df = original rows that are in a cluster, with cluster_id
+    clustered_articles_df = (
+        df.merge(
+            cluster_df[["_row_index", "cluster_id"]],
+            on="_row_index",
+            how="inner",
+        )
+        .drop(columns=["_row_index"])
+        .reset_index(drop=True)
+    )
+
+    # final cluster_df with requested columns only
+    cluster_df = cluster_df.drop(columns=["_row_index"]).reset_index(drop=True)
+
+    return cluster_df, clustered_articles_df
+
+
+ALLOWED_POS = {"NOUN", "ADJ"}
+ALLOWED_ENTS = {"ORG", "PERSON", "GPE", "EVENT", "LOC"}
+
+
+def normalize_entities(text: str) -> str:
+    text = text.strip().lower()
+    text = re.sub(r"[^a-z0-9]+", "_", text)
+    return text
+
+
+def split_possessive_entity(text: str) -> list[str]:
+    """
+    Splits a possessive entity expression into its components.
+
+    This function takes a text string containing a possessive entity (e.g., "Trump's Greenland")
+    and splits it into its constituent components, normalizing each part. The possessive
+    marker "'s" (or "’s") is removed, and the resulting components are filtered to exclude
+    empty strings.
+
+    Args:
+        text (str): The input text containing a possessive entity.
+
+    Returns:
+        A list of normalized components of the possessive expression, excluding empty strings.
+    """
+    # Split once: "Trump's Greenland" -> ["Trump", " Greenland"]
+    parts = re.split(r"(?:'s|’s)\b", text, maxsplit=1)
+    out = [normalize_entities(p) for p in parts]
+    return [x for x in out if x]
+
+
+def keywords_from_doc(doc: Any) -> list[str]:
+    """
+    Named entities and frequent noun/adjective lemmas of a spaCy doc, at most 10.
+    """
+    # Extract entities
+    entities: list[str] = []
+    for ent in doc.ents:
+        if ent.label_ not in ALLOWED_ENTS:
+            continue
+
+        if re.search(r"(?:'s|’s)\b", ent.text):
+            entities.extend(split_possessive_entity(ent.text))
+        else:
+            norm = normalize_entities(ent.text)
+            if norm:
+                entities.append(norm)
+
+    # Extract lemmas from allowed POS
+    lemmas = [
+        t.lemma_.lower()
+        for t in doc
+        if t.pos_ in ALLOWED_POS
+        and not t.is_stop
+        and not t.like_num
+        and t.is_alpha
+    ]
+    sorted_lemmas = [w for w, _ in Counter(lemmas).most_common()]
+
+    # Merge entities and lemmas, keeping only unique terms
+    seen = set()
+    combined: list[str] = []
+    for term in entities + sorted_lemmas:
+        if term and term not in seen:
+            seen.add(term)
+            combined.append(term)
+
+    return combined[:10]
+
+
+class SpacyKeywordExtractor:
+    """
+    Keyword extraction with a spaCy pipeline (NER + POS tagging), loaded on first use.
+    """
+
+    def __init__(self, model: str = "en_core_web_sm"):
+        self.model = model
+        self._nlp = None
+
+    def extract(self, texts: list[str]) -> list[list[str]]:
+        import spacy
+
+        if self._nlp is None:
+            self._nlp = spacy.load(self.model)
+        return [keywords_from_doc(doc) for doc in self._nlp.pipe(texts)]
+
+
+def top_keywords_tf(keywords: pd.Series, top_n: int = 10) -> list[str]:
+    c = Counter()
+    for kws in keywords.dropna():
+        if isinstance(kws, list):
+            c.update(kws)
+    return [k for k, _ in c.most_common(top_n)]
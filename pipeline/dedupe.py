@@ -0,0 +1,93 @@
+"""
+Near-duplicate detection with MinHash + LSH (ported from notebooks/01_data_extraction.ipynb).
+
+Syndicated copies of a story (e.g. wire copy carried by several outlets under different URLs) are
+grouped, so classification and embedding can run once per group and be fanned out to every member.
+"""
+import hashlib
+import re
+
+import numpy as np
+
+NUM_PERM = 128
+
+# Random multiply-shift permutations for MinHash (fixed seed so signatures are reproducible)
+_rng = np.random.default_rng(42)
+_PERM_A = _rng.integers(1, 2**63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.integers(0, 2**63, size=NUM_PERM, dtype=np.uint64)
+
+
+def shingles(text: str, k: int = 3) -> set[str]:
+    """
+    Word k-grams of the normalised text.
+    """
+    tokens = re.findall(r"[a-z0-9]+", (text or "").lower())
+    if len(tokens) <= k:
+        return {" ".join(tokens)}
+    return {" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+
+
+def minhash_signature(text: str) -> np.ndarray:
+    """
+    MinHash signature of the text's shingles. The fraction of equal positions between two
+    signatures estimates the Jaccard similarity of the texts.
+    """
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little") for s in shingles(text)],
+        dtype=np.uint64,
+    )
+    return ((hashes[:, None] * _PERM_A[None, :] + _PERM_B[None, :]) >> np.uint64(32)).min(axis=0)
+
+
+class NearDuplicateIndex:
+    """
+    Incremental LSH index over MinHash signatures.
+
+    Articles are added one at a time, as they stream through the pipeline. An article that is
+    near-identical to one already indexed joins that article's group; otherwise it becomes the
+    representative of a new group. The group id is the representative's url.
+    """
+
+    def __init__(self, threshold: float = 0.8, bands: int = 32):
+        if NUM_PERM % bands:
+            raise ValueError(f"NUM_PERM ({NUM_PERM}) must be divisible by bands ({bands})")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self._buckets: list[dict[bytes, list[str]]] = [{} for _ in range(bands)]
+        self._signatures: dict[str, np.ndarray] = {}
+
+    def _band_keys(self, sig: np.ndarray) -> list[bytes]:
+        return [sig[b * self.rows:(b + 1) * self.rows].tobytes() for b in range(self.bands)]
+
+    def add(self, url: str, text: str, group: str | None = None) -> str:
+        """
+        Indexes an article and returns its group id.
+
+        Args:
+            url: Article url.
+            text: Text to compare, usually the summary.
+            group: Known group id, used when rebuilding the index from checkpointed records.
+
+        Returns:
+            The url of the group's representative
+        """
+        sig = minhash_signature(text)
+        keys = self._band_keys(sig)
+
+        if group is None:
+            group = url
+            best = self.threshold
+            candidates = {rep for b, key in enumerate(keys) for rep in self._buckets[b].get(key, [])}
+            for rep in candidates:
+                sim = float(np.mean(self._signatures[rep] == sig))
+                if sim >= best:
+                    group, best = rep, sim
+
+        # Only representatives are indexed, so every group is matched through its first article
+        if group == url:
+            self._signatures[url] = sig
+            for b, key in enumerate(keys):
+                self._buckets[b].setdefault(key, []).append(url)
+
+        return group
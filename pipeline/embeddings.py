@@ -0,0 +1,38 @@
+"""
+Article and cluster embeddings.
+"""
+from typing import Optional
+
+from app.rate_limit import BATCH, estimate_tokens, get_limiter, response_tokens
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+
+class OpenAIEmbedder:
+    """
+    Batched OpenAI embeddings. dimensions shortens the output (e.g. 256 or 512), None keeps the full size.
+    Requests go through the shared rate limiter for the model.
+    """
+
+    def __init__(self, model: str = EMBEDDING_MODEL, dimensions: Optional[int] = None):
+        from openai import OpenAI
+
+        self.model = model
+        self.dimensions = dimensions
+        self.client = OpenAI(max_retries=0)
+        self.limiter = get_limiter(model)
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        # One request per batch instead of one per text
+        texts = [t.replace("\n", " ") for t in texts]
+        params = {"dimensions": self.dimensions} if self.dimensions else {}
+        res = self.limiter.call(
+            self.client.embeddings.create,
+            priority=BATCH,
+            tokens=sum(estimate_tokens(t) for t in texts),
+            usage=response_tokens,
+            input=texts,
+            model=self.model,
+            **params,
+        )
+        return [d.embedding for d in sorted(res.data, key=lambda d: d.index)]
@@ -0,0 +1,143 @@
+"""
+RSS fetching and text cleaning (ported from notebooks/01_data_extraction.ipynb).
+"""
+import re
+import time
+import unicodedata
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+RSS_FEEDS = {
+    "SMH": [
+        'https://www.smh.com.au/rss/feed.xml',
+        'https://www.smh.com.au/rss/sport.xml',
+        'https://www.smh.com.au/rss/business.xml',
+        'https://www.smh.com.au/rss/lifestyle.xml',
+        'https://www.smh.com.au/rss/culture.xml',
+    ],
+    "SBS": [
+        'https://www.sbs.com.au/news/feed',
+        'https://www.sbs.com.au/news/topic/australia/feed',
+        'https://www.sbs.com.au/news/topic/latest/feed',
+    ],
+    "The Guardian": [
+        'https://www.theguardian.com/australia-news/rss',
+        'https://www.theguardian.com/au/sport/rss',
+        'https://www.theguardian.com/au/culture/rss',
+        'https://www.theguardian.com/au/lifeandstyle/rss',
+        'https://www.theguardian.com/au/business/rss',
+    ],
+    "ESPN": [
+        'https://www.espn.com.au/espn/rss/news',
+    ],
+    "ABC": [
+        'https://www.abc.net.au/news/feed/10719986/rss.xml',
+        'https://www.abc.net.au/news/feed/51120/rss.xml',
+        'https://www.abc.net.au/news/feed/103728564/rss.xml',
+        'https://www.abc.net.au/news/feed/103728568/rss.xml',
+        'https://www.abc.net.au/news/feed/103728570/rss.xml',
+    ],
+    "Canberra Times": [
+        'https://www.canberratimes.com.au/rss.xml',
+    ],
+}
+
+
+def clean_text(txt: str | None) -> str | None:
+    """
+    Cleans the given HTML or plain text input by removing HTML tags,
+    invisible characters, and diacritics. This can be used to sanitize
+    and normalize text content extracted from various sources.
+
+    Args:
+        txt: The input text which may contain HTML tags.
+    Returns:
+        The cleaned text
+    """
+    from bs4 import BeautifulSoup
+
+    if not txt:
+        return None
+
+    text = BeautifulSoup(txt, "html.parser").get_text(" ", strip=True)
+
+    # Remove invisible chars in RSS text
+    regex = re.compile(r"[\ufeff\u200b\u200c\u200d]")
+    text = regex.sub("", text)
+
+    # decompose then drop diacritics/combining marks (café -> cafe)
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+
+    return text
+
+
+def clean_url(url: str | None) -> str | None:
+    if not url:
+        return url
+    return url.split("?", 1)[0].split("#", 1)[0]
+
+
+def parse_date(st: time.struct_time | None) -> str | None:
+    """
+    Converts a feedparser date to an RFC3339 UTC string (records are serialised to JSON between stages).
+    """
+    if not st:
+        return None
+    else:
+        return datetime(*st[:6], tzinfo=timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def make_summary(title: str, description: str) -> str:
+    sep = "" if title.endswith((".", "!", "?")) else "."
+    return f"{title}{sep} {description}"
+
+
+def fetch_feed(source: str, feed_url: str, limit_per_feed: int = 40) -> list[dict[str, Any]]:
+    """
+    Fetches the raw entries of one RSS feed. feed_url may also be a local file path.
+
+    Args:
+        source: Name of the news source.
+        feed_url: RSS feed URL or file path.
+        limit_per_feed: The maximum number of entries to fetch. Defaults to 40.
+
+    Returns:
+        A list of raw article records
+    """
+    import feedparser
+
+    feed = feedparser.parse(feed_url)
+    return [
+        {
+            "url": entry.get("link"),
+            "source": source,
+            "title": entry.get("title"),
+            "description": entry.get("description"),
+            "author": entry.get("author") or source,
+            "published": parse_date(entry.get("published_parsed")),
+        }
+        for entry in feed.entries[:limit_per_feed]
+    ]
+
+
+def clean_record(record: dict[str, Any]) -> Optional[dict[str, Any]]:
+    """
+    Cleans one raw article record, or returns None if it has no title or description.
+    """
+    if record.get("title") in (None, "null") or record.get("description") in (None, "null"):
+        return None
+
+    title = clean_text(record["title"])
+    description = clean_text(record["description"])
+    if not title or not description:
+        return None
+
+    return {
+        **record,
+        "url": clean_url(record.get("url")),
+        "title": title,
+        "description": description,
+        # Create a summary from title and description
+        "summary": make_summary(title, description),
+    }
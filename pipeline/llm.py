@@ -0,0 +1,186 @@
+"""
+LLM classification and cluster summarisation (ported from notebooks/02_classify.ipynb and 03_clustering.ipynb).
+"""
+from json import JSONDecodeError
+from textwrap import dedent
+from typing import Literal
+
+import instructor
+import litellm
+from instructor.core.exceptions import ValidationError as InstructorValidationError
+from instructor.utils import disable_pydantic_error_url
+from langsmith import traceable
+from litellm import completion
+from pydantic import BaseModel, Field, ValidationError
+from tenacity import Retrying, retry_if_exception_type, stop_after_attempt
+
+from app.rate_limit import BATCH, estimate_message_tokens, get_limiter, response_tokens
+
+#litellm._turn_on_debug()
+litellm.drop_params = True
+disable_pydantic_error_url()
+
+# Initialize the instructor client
+client = instructor.from_litellm(completion)
+
+MODEL_PARAMS = {
+    "ls_provider": "openai",
+    "ls_model_name": "gpt-4.1",
+}
+
+
+def sanitise_inputs(inputs: dict) -> dict:
+    del inputs['response_model']
+    return inputs
+
+
+def validation_retries(max_retries: int) -> Retrying:
+    """
+    Lets instructor retry invalid outputs only. API errors such as rate limits are raised to the rate limiter,
+    which retries them for all callers together.
+    """
+    return Retrying(
+        stop=stop_after_attempt(max_retries),
+        retry=retry_if_exception_type((ValidationError, JSONDecodeError, InstructorValidationError)),
+    )
+
+
+@traceable(name='LLMRun', run_type='llm', process_inputs=sanitise_inputs)
+def get_llm_response(
+        messages: list[dict[str, str]],
+        ls_provider="openai",
+        ls_model_name="gpt-4.1",
+        temperature=0,
+        seed=None,
+        response_model=None,
+        max_retries=2,
+        priority=BATCH,
+):
+    """
+    Helper function to get a response from the OpenAI compatible completion endpoints using litellm and instructor.
+    Requests go through the shared rate limiter for the model, which also retries rate limits, and are traced with langsmith.
+    """
+
+    model = f"{ls_provider}/{ls_model_name}"
+
+    params = {
+        "messages": messages,
+        "model": model,
+        "temperature": temperature,
+        "num_retries": 0,
+    }
+
+    if seed is not None:
+        params["seed"] = seed
+
+    if response_model is not None:
+        # Instructor structured outputs
+        params["response_model"] = response_model
+
+        # Set number of retries incase output does not match the response_model
+        params["max_retries"] = validation_retries(max_retries)
+
+    limiter = get_limiter(model)
+    # Instructor sends the response model's schema as a tool
+    tools = [response_model.model_json_schema()] if response_model is not None else None
+    tokens = estimate_message_tokens(messages, tools)
+
+    if response_model is not None:
+        # create_with_completion also returns the raw completion, whose usage corrects the token estimate
+        res, _ = limiter.call(
+            client.chat.completions.create_with_completion,
+            priority=priority,
+            tokens=tokens,
+            usage=lambda r: response_tokens(r[1]),
+            **params,
+        )
+        return res
+
+    return limiter.call(completion, priority=priority, tokens=tokens, usage=response_tokens, **params)
+
+
+# Define the classification prompt and response model
+classifier_prompt = dedent("""
+You will be provided with a short summary of a news article.
+Your task is to classify the news article into one of the following categories: <Finance>, <Music>, <Lifestyle>, <Sports>, <Other>.
+Use <Other> if the category cannot be confidently determined as either <Finance>, <Music>, <Lifestyle>, <Sports>.
+""")
+
+
+class Classifier(BaseModel):
+    """
+    Classify the news article into one of the following categories: Finance, Music, Lifestyle, Sports, Other
+    Use Other if the category cannot be confidently determined as either Finance, Music, Lifestyle, Sports.
+    """
+    Category: Literal["Finance", "Music", "Lifestyle", "Sports", "Other"] = Field(
+        ...,
+        description="The predicted category of the news article"
+    )
+
+
+# Define the story prompt and response model
+story_prompt = dedent("""
+You will be presented with a list of news articles belonging to the same news story cluster.
+Your task is to extract <title> and <summary> of the cluster that accurately repesents the story.
+
+Guidelines:
+- You must only use the information and facts provided in the articles.
+- <title> should be a concise headline (less than 8 words) for the news story cluster in Australian Spelling. Use sentence case.
+- <summary> should be an accurate summary including relevant information and entities in Australian Spelling. Length should be between 30-50 words.
+""")
+
+
+class StoryResponse(BaseModel):
+    title: str = Field(
+        ...,
+        description="Short title of the given news cluster in Australian Spelling. Use sentence case. Must be less than 8 words.",
+    )
+    summary: str = Field(
+        ...,
+        description="Summary of the given news cluster in Australian Spelling. Length should be between 30-50 words.",
+    )
+
+
+@traceable(name='Classifier', run_type='tool')
+def run_classification(summary: str) -> Classifier:
+    messages = [
+        {"role": "system", "content": classifier_prompt},
+        {"role": "user", "content": summary}
+    ]
+    return get_llm_response(
+        messages=messages,
+        **MODEL_PARAMS,
+        seed=42,
+        response_model=Classifier,
+        langsmith_extra={'metadata': MODEL_PARAMS},
+    )
+
+
+@traceable(name='ClusterContent', run_type='tool')
+def get_cluster_data(articles: str) -> StoryResponse:
+    messages = [
+        {"role": "system", "content": story_prompt},
+        {"role": "user", "content": f"Articles:\n----\n{articles}"}
+    ]
+    return get_llm_response(
+        messages=messages,
+        **MODEL_PARAMS,
+        seed=42,
+        response_model=StoryResponse,
+        langsmith_extra={'metadata': MODEL_PARAMS},
+    )
+
+
+class LLMClassifier:
+    """Classifies article summaries into a category with the LLM."""
+
+    def classify(self, summary: str) -> str:
+        return run_classification(summary).Category
+
+
+class LLMSummarizer:
+    """Generates a cluster title and summary from its article summaries with the LLM."""
+
+    def summarize(self, summaries: list[str]) -> tuple[str, str]:
+        res = get_cluster_data("\n----\n".join(summaries))
+        return res.title, res.summary
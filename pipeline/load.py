@@ -0,0 +1,341 @@
+"""
+Weaviate schema and loading (ported from notebooks/03_clustering.ipynb).
+"""
+import os
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import pandas as pd
+import weaviate
+from weaviate.util import generate_uuid5
+from weaviate.classes.config import (
+    Configure,
+    DataType,
+    Property,
+    ReferenceProperty,
+    VectorDistances,
+)
+
+ARTICLE_COL = "Article"
+CLUSTER_COL = "Cluster"
+
+
+def to_rfc3339(val: Any) -> Optional[str]:
+    """
+    Converts input to RFC3339 UTC string, or None if invalid.
+    """
+    if val is None or val is pd.NaT or (isinstance(val, float) and pd.isna(val)):
+        return None
+
+    if isinstance(val, str):
+        return val.replace("+00:00", "Z")
+
+    return val.isoformat().replace("+00:00", "Z")
+
+
+def keywords_to_text(kw: Any) -> str:
+    """
+    Converts keywords input to a single text string.
+    """
+    if kw is None:
+        return ""
+    else:
+        return " ".join(kw)
+
+
+def uuid_for_article(url: str) -> str:
+    return str(generate_uuid5(url))
+
+
+def uuid_for_cluster(cluster_id: str) -> str:
+    return str(generate_uuid5(f"cluster::{cluster_id}"))
+
+
+def check_vector_dim(client: weaviate.WeaviateClient, name: str, embedding_dim: int) -> None:
+    """
+    Raises if an existing collection holds vectors of a different dimension.
+    The HNSW index dimension is fixed by the first vector inserted, so changing EMBEDDING_DIM
+    requires recreating the collections.
+    """
+    res = client.collections.get(name).query.fetch_objects(limit=1, include_vector=True)
+    if not res.objects:
+        return
+
+    vec = res.objects[0].vector
+    if isinstance(vec, dict):
+        vec = next(iter(vec.values()), None)
+
+    if vec is not None and len(vec) != embedding_dim:
+        raise ValueError(
+            f"Collection '{name}' has {len(vec)}-dim vectors but embeddings are {embedding_dim}-dim. "
+            f"Delete and recreate the collection to change the embedding dimension."
+        )
+
+
+def _add_reference_if_missing(collection: Any, name: str, target: str) -> None:
+    if name not in {r.name for r in collection.config.get().references}:
+        collection.config.add_reference(ReferenceProperty(name=name, target_collection=target))
+
+
+def _add_properties_if_missing(collection: Any, properties: list[Property]) -> None:
+    existing = {p.name for p in collection.config.get().properties}
+    for prop in properties:
+        if prop.name not in existing:
+            collection.config.add_property(prop)
+
+
+# Time metadata of a cluster, derived from the published dates of its articles (see cluster_time_metadata)
+CLUSTER_TIME_PROPERTIES = [
+    Property(name="first_published", data_type=DataType.DATE),
+    Property(name="last_published", data_type=DataType.DATE),
+    Property(
+        name="daily_counts",
+        data_type=DataType.OBJECT_ARRAY,
+        nested_properties=[
+            Property(name="day", data_type=DataType.TEXT),
+            Property(name="count", data_type=DataType.INT),
+        ],
+    ),
+]
+
+
+# Time metadata of clusters without dated articles
+NO_TIME_METADATA = {"first_published": None, "last_published": None, "daily_counts": []}
+
+
+def cluster_time_metadata(articles_df: pd.DataFrame) -> dict[str, dict[str, Any]]:
+    """
+    First and last published time and number of articles per (UTC) day for each cluster_id.
+    Articles without a published date are not counted.
+    """
+    df = pd.DataFrame({
+        "cluster_id": articles_df["cluster_id"].astype(str),
+        "published": pd.to_datetime(articles_df["published"], errors="coerce", utc=True),
+    }).dropna(subset=["published"])
+    df["day"] = df["published"].dt.strftime("%Y-%m-%d")
+
+    meta = {}
+    for cid, g in df.groupby("cluster_id"):
+        counts = g["day"].value_counts().sort_index()
+        meta[cid] = {
+            "first_published": to_rfc3339(g["published"].min()),
+            "last_published": to_rfc3339(g["published"].max()),
+            "daily_counts": [{"day": day, "count": int(n)} for day, n in counts.items()],
+        }
+    return meta
+
+
+def create_schema(client: weaviate.WeaviateClient, embedding_dim: Optional[int] = None) -> None:
+    """
+    Creates the required Weaviate schema for Article and Cluster collections.
+    If embedding_dim is given, existing collections are checked to hold vectors of the same dimension.
+    """
+    if embedding_dim is not None:
+        for name in (ARTICLE_COL, CLUSTER_COL):
+            if client.collections.exists(name):
+                check_vector_dim(client, name, embedding_dim)
+
+    # 1) Create Article collection
+    if not client.collections.exists(ARTICLE_COL):
+        client.collections.create(
+            name=ARTICLE_COL,
+            properties=[
+                Property(name="url", data_type=DataType.TEXT),
+                Property(name="source", data_type=DataType.TEXT),
+                Property(name="title", data_type=DataType.TEXT),
+                Property(name="author", data_type=DataType.TEXT),
+                Property(name="published", data_type=DataType.DATE),
+                Property(name="summary", data_type=DataType.TEXT),
+                Property(name="category", data_type=DataType.TEXT),
+                Property(name="cluster_id", data_type=DataType.TEXT),
+            ],
+            vector_config=Configure.Vectors.self_provided(
+                vector_index_config=Configure.VectorIndex.hnsw(
+                    distance_metric=VectorDistances.COSINE
+                )
+            ),
+        )
+
+    # 2) Create Cluster collection
+    if not client.collections.exists(CLUSTER_COL):
+        client.collections.create(
+            name=CLUSTER_COL,
+            properties=[
+                Property(name="cluster_id", data_type=DataType.TEXT),
+                Property(name="category", data_type=DataType.TEXT),
+                Property(name="num_articles", data_type=DataType.INT),
+                Property(name="keywords", data_type=DataType.TEXT),
+                Property(name="title", data_type=DataType.TEXT),
+                Property(name="summary", data_type=DataType.TEXT),
+                *CLUSTER_TIME_PROPERTIES,
+            ],
+            vector_config=Configure.Vectors.self_provided(
+                vector_index_config=Configure.VectorIndex.hnsw(
+                    distance_metric=VectorDistances.COSINE
+                )
+            ),
+        )
+
+    # 3) Add references
+    Article = client.collections.get(ARTICLE_COL)
+    Cluster = client.collections.get(CLUSTER_COL)
+
+    # Clusters created before the time metadata was added
+    _add_properties_if_missing(Cluster, CLUSTER_TIME_PROPERTIES)
+
+    # Add Cluster.articles -> Article (if missing)
+    _add_reference_if_missing(Cluster, "articles", ARTICLE_COL)
+
+    # Add Article.cluster -> Cluster (if missing)
+    _add_reference_if_missing(Article, "cluster", CLUSTER_COL)
+
+
+@dataclass(frozen=True)
+class LoadStats:
+    clusters_written: int
+    articles_written: int
+    refs_written: int
+
+
+def load_dataframes_to_weaviate(
+    client: weaviate.WeaviateClient,
+    *,
+    clusters_df: pd.DataFrame,
+    articles_df: pd.DataFrame,
+    cluster_embedding_col: str = "embedding",
+    article_embedding_col: str = "embedding",
+    batch_size: int = 256,
+) -> LoadStats:
+    """
+    Loads clusters and articles dataframes into Weaviate.
+    Objects get deterministic UUIDs, so loading the same rows again overwrites them.
+    Expects the schema to exist (see create_schema).
+    """
+    Cluster = client.collections.get(CLUSTER_COL)
+    Article = client.collections.get(ARTICLE_COL)
+
+    # ---- 0) minimal sanitization (cheap + safe) ----
+    # Ensure strings are strings, keywords become text
+    clusters = clusters_df.copy()
+    clusters["cluster_id"] = clusters["cluster_id"].astype(str)
+    clusters["keywords"] = clusters["keywords"].apply(keywords_to_text)
+
+    articles = articles_df.copy()
+    articles["url"] = articles["url"].astype(str)
+    articles["cluster_id"] = articles["cluster_id"].astype(str)
+
+    # Convert published to RFC3339 once to avoid doing it repeatedly in loop
+    articles["published_rfc3339"] = articles["published"].apply(to_rfc3339)
+
+    # Cluster -> articles (one-to-many), written with the cluster objects instead of one request per edge
+    article_uuids = (
+        articles.groupby("cluster_id")["url"].apply(lambda urls: [uuid_for_article(u) for u in urls]).to_dict()
+    )
+
+    # Published range and articles per day, so clusters can be filtered and ranked by date
+    time_meta = cluster_time_metadata(articles)
+
+    # ---- 1) Insert clusters ----
+    clusters_written = 0
+    refs_written = 0
+    with Cluster.batch.dynamic() as batch:
+        batch.batch_size = batch_size
+        for row in clusters.itertuples(index=False):
+            cid = str(getattr(row, "cluster_id"))
+            uuid = uuid_for_cluster(cid)
+
+            vec = getattr(row, cluster_embedding_col)
+
+            props = {
+                "cluster_id": cid,
+                "category": getattr(row, "category", "") or "",
+                "num_articles": int(getattr(row, "num_articles", 0) or 0),
+                "keywords": getattr(row, "keywords", "") or "",
+                "title": getattr(row, "title", "") or "",
+                "summary": getattr(row, "summary", "") or "",
+                **time_meta.get(cid, NO_TIME_METADATA),
+            }
+
+            refs = article_uuids.get(cid, [])
+            batch.add_object(uuid=uuid, properties=props, references={"articles": refs}, vector=vec)
+            clusters_written += 1
+            refs_written += len(refs)
+
+    # ---- 2) Insert articles ----
+    articles_written = 0
+    with Article.batch.dynamic() as batch:
+        batch.batch_size = batch_size
+        for row in articles.itertuples(index=False):
+            url = str(getattr(row, "url"))
+            uuid = uuid_for_article(url)
+
+            vec = getattr(row, article_embedding_col)
+            published = getattr(row, "published_rfc3339")
+            cid = str(getattr(row, "cluster_id") or "")
+
+            props = {
+                "url": url,
+                "source": getattr(row, "source", "") or "",
+                "title": getattr(row, "title", "") or "",
+                "author": getattr(row, "author", "") or "",
+                "published": published,
+                "summary": getattr(row, "summary", "") or "",
+                "category": getattr(row, "category", "") or "",
+                "cluster_id": cid,
+            }
+
+            # Article -> cluster (one-to-one)
+            refs = {"cluster": uuid_for_cluster(cid)} if cid else None
+            batch.add_object(uuid=uuid, properties=props, references=refs, vector=vec)
+            articles_written += 1
+            refs_written += 1 if cid else 0
+
+    for name, col in ((CLUSTER_COL, Cluster), (ARTICLE_COL, Article)):
+        if col.batch.failed_objects:
+            raise RuntimeError(f"{len(col.batch.failed_objects)} {name} objects failed to load: {col.batch.failed_objects[0].message}")
+
+    return LoadStats(
+        clusters_written=clusters_written,
+        articles_written=articles_written,
+        refs_written=refs_written,
+    )
+
+
+class WeaviateSink:
+    """
+    Loads cluster records (with their articles) into Weaviate Cloud.
+    """
+
+    def __init__(self, url: Optional[str] = None, api_key: Optional[str] = None, batch_size: int = 256):
+        self.url = url or os.environ["WEAVIATE_URL"]
+        self.api_key = api_key or os.environ["WEAVIATE_API_KEY"]
+        self.batch_size = batch_size
+        self.client: Optional[weaviate.WeaviateClient] = None
+        self._schema_ready = False
+
+    def open(self) -> None:
+        from weaviate.classes.init import Auth
+
+        # Connect to Weaviate Cloud
+        self.client = weaviate.connect_to_weaviate_cloud(
+            cluster_url=self.url,
+            auth_credentials=Auth.api_key(self.api_key),
+        )
+
+    def write(self, clusters_df: pd.DataFrame, articles_df: pd.DataFrame) -> LoadStats:
+        if not self._schema_ready:
+            # All vectors share one dimension (see EMBEDDING_DIM)
+            embedding_dim = len(clusters_df["embedding"].iloc[0]) if len(clusters_df) else None
+            create_schema(self.client, embedding_dim=embedding_dim)
+            self._schema_ready = True
+
+        return load_dataframes_to_weaviate(
+            self.client,
+            clusters_df=clusters_df,
+            articles_df=articles_df,
+            batch_size=self.batch_size,
+        )
+
+    def close(self) -> None:
+        if self.client:
+            self.client.close()
@@ -0,0 +1,170 @@
+"""
+Local stand-ins for the external services, so the whole pipeline can run offline:
+- sample RSS feeds from pipeline/fixtures instead of the live feeds
+- keyword rules instead of the LLM classifier
+- hashed bag-of-words vectors instead of OpenAI embeddings
+- extractive titles/summaries instead of the LLM summariser
+- simple term frequency keywords instead of spaCy
+- a directory of JSON objects instead of Weaviate
+"""
+import hashlib
+import json
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from pipeline.load import (
+    NO_TIME_METADATA,
+    LoadStats,
+    cluster_time_metadata,
+    keywords_to_text,
+    to_rfc3339,
+    uuid_for_article,
+    uuid_for_cluster,
+)
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+LOCAL_FEEDS = {
+    "SMH": [str(FIXTURES_DIR / "smh.xml")],
+    "SBS": [str(FIXTURES_DIR / "sbs.xml")],
+    "ABC": [str(FIXTURES_DIR / "abc.xml")],
+    "Canberra Times": [str(FIXTURES_DIR / "canberra_times.xml")],
+}
+
+CATEGORY_TERMS = {
+    "Finance": {"bank", "cash", "rate", "inflation", "shares", "asx", "dollar", "market", "stocks", "index", "economy"},
+    "Sports": {"matildas", "goal", "goals", "match", "cricket", "test", "wickets", "tennis", "seed", "draw", "friendly"},
+    "Music": {"music", "festival", "bands", "singers", "orchestra", "concerts", "symphony", "album", "tour"},
+    "Lifestyle": {"cafe", "coffee", "food", "breakfast", "travel", "walks", "holiday", "recipes", "cook", "walking"},
+}
+
+STOPWORDS = {
+    "the", "a", "an", "and", "or", "of", "in", "on", "at", "to", "for", "with", "from", "by", "as", "is", "was",
+    "has", "have", "been", "its", "it", "this", "that", "after", "across", "over", "will", "be", "than", "per",
+}
+
+
+def _tokens(text: str) -> list[str]:
+    return re.findall(r"[a-z0-9]+", (text or "").lower())
+
+
+class KeywordClassifier:
+    """Picks the category with the most matching terms, Other if none match."""
+
+    def classify(self, summary: str) -> str:
+        tokens = _tokens(summary)
+        scores = {c: sum(t in terms for t in tokens) for c, terms in CATEGORY_TERMS.items()}
+        best = max(scores, key=scores.get)
+        return best if scores[best] else "Other"
+
+
+class HashingEmbedder:
+    """
+    Deterministic unit vectors from hashed word counts, so texts sharing words are close in cosine distance.
+    """
+
+    def __init__(self, dimensions: Optional[int] = None):
+        self.dimensions = dimensions or 1536
+
+    def _embed(self, text: str) -> list[float]:
+        vec = np.zeros(self.dimensions, dtype=np.float32)
+        for token in _tokens(text):
+            if token in STOPWORDS:
+                continue
+            h = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+            vec[h % self.dimensions] += 1.0 if (h >> 32) & 1 else -1.0
+        norm = np.linalg.norm(vec)
+        return (vec / norm if norm else vec).tolist()
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(t) for t in texts]
+
+
+class ExtractiveSummarizer:
+    """Title from the first article's headline, summary from its first 50 words."""
+
+    def summarize(self, summaries: list[str]) -> tuple[str, str]:
+        first = summaries[0] if summaries else ""
+        headline = re.split(r"(?<=[.!?])\s", first, maxsplit=1)[0].rstrip(".!?")
+        return " ".join(headline.split()[:8]), " ".join(first.split()[:50])
+
+
+class TermFrequencyKeywords:
+    """Most frequent non-stopword terms."""
+
+    def extract(self, texts: list[str]) -> list[list[str]]:
+        out = []
+        for text in texts:
+            counts = Counter(t for t in _tokens(text) if t not in STOPWORDS and len(t) > 3 and not t.isdigit())
+            out.append([t for t, _ in counts.most_common(10)])
+        return out
+
+
+class LocalVectorStore:
+    """
+    Writes clusters and articles as JSON files named by their Weaviate UUID, mirroring the
+    upsert semantics of load_dataframes_to_weaviate.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def open(self) -> None:
+        (self.path / "Cluster").mkdir(parents=True, exist_ok=True)
+        (self.path / "Article").mkdir(parents=True, exist_ok=True)
+
+    def _put(self, collection: str, uuid: str, obj: dict) -> None:
+        (self.path / collection / f"{uuid}.json").write_text(json.dumps(obj, ensure_ascii=False))
+
+    def write(self, clusters_df: pd.DataFrame, articles_df: pd.DataFrame) -> LoadStats:
+        refs_written = 0
+        time_meta = cluster_time_metadata(articles_df)
+        for c in clusters_df.to_dict("records"):
+            cid = str(c["cluster_id"])
+            members = articles_df[articles_df["cluster_id"].astype(str) == cid]["url"].tolist()
+            self._put("Cluster", uuid_for_cluster(cid), {
+                "properties": {
+                    "cluster_id": cid,
+                    "category": c.get("category") or "",
+                    "num_articles": int(c.get("num_articles") or 0),
+                    "keywords": keywords_to_text(c.get("keywords")),
+                    "title": c.get("title") or "",
+                    "summary": c.get("summary") or "",
+                    **time_meta.get(cid, NO_TIME_METADATA),
+                },
+                "references": {"articles": [uuid_for_article(u) for u in members]},
+                "vector": c["embedding"],
+            })
+            refs_written += len(members)
+
+        for a in articles_df.to_dict("records"):
+            cid = str(a.get("cluster_id") or "")
+            self._put("Article", uuid_for_article(str(a["url"])), {
+                "properties": {
+                    "url": str(a["url"]),
+                    "source": a.get("source") or "",
+                    "title": a.get("title") or "",
+                    "author": a.get("author") or "",
+                    "published": to_rfc3339(a.get("published")),
+                    "summary": a.get("summary") or "",
+                    "category": a.get("category") or "",
+                    "cluster_id": cid,
+                },
+                "references": {"cluster": uuid_for_cluster(cid)} if cid else {},
+                "vector": a["embedding"],
+            })
+            refs_written += 1 if cid else 0
+
+        return LoadStats(
+            clusters_written=len(clusters_df),
+            articles_written=len(articles_df),
+            refs_written=refs_written,
+        )
+
+    def close(self) -> None:
+        pass
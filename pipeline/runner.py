@@ -0,0 +1,375 @@
+"""
+Streaming stage runner.
+
+Each stage runs in its own thread and receives chunks (lists of record dicts) from the previous
+stage through a bounded queue, so only a few chunks per stage are in memory at a time. Within a
+stage, `Stage.map` spreads the per-record work over the stage's own thread pool.
+
+Every output chunk is checkpointed to `<run_dir>/<NN>_<stage>/<chunk>.jsonl`, together with a hash of
+the input chunk it was made from. When a run is restarted with the same run directory:
+- the pipeline starts from the output of the last completed stage instead of re-running the stages before it
+- chunks that a stage already checkpointed from the same input are replayed rather than processed again,
+  and passed to `Stage.observe` so stages can rebuild state that later chunks depend on
+"""
+import hashlib
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+Record = dict[str, Any]
+Chunk = list[Record]
+
+_END = object()
+
+
+class PipelineError(RuntimeError):
+    """Raised when a stage fails. Completed chunks stay checkpointed, so the run can be resumed."""
+
+
+class Stage:
+    """
+    Base class for pipeline stages.
+
+    Map stages implement `process`, which turns one input chunk into one output chunk.
+    Barrier stages (barrier = True) need all input before producing output: they implement
+    `collect` for each input chunk and return their output records from `finish`.
+    """
+    name: str = ""
+    barrier: bool = False
+
+    def __init__(self, workers: int = 1):
+        self.workers = workers
+        self.metrics: Counter = Counter()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def setup(self) -> None:
+        """Open clients/connections. Called in the stage thread before the first chunk."""
+
+    def close(self) -> None:
+        """Release clients/connections. Always called, also when the run fails."""
+
+    def process(self, chunk: Chunk) -> Chunk:
+        raise NotImplementedError
+
+    def observe(self, chunk: Chunk) -> None:
+        """Called with checkpointed output chunks that are replayed instead of processed."""
+
+    def collect(self, chunk: Chunk) -> None:
+        raise NotImplementedError
+
+    def finish(self) -> list[Record]:
+        raise NotImplementedError
+
+    def map(self, fn: Callable[[Any], Any], items: Iterable[Any]) -> list[Any]:
+        """Apply fn to items concurrently on the stage's thread pool, preserving order."""
+        items = list(items)
+        if self._pool is None or self.workers <= 1 or len(items) <= 1:
+            return [fn(x) for x in items]
+        return list(self._pool.map(fn, items))
+
+
+def _json_default(o: Any) -> Any:
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    # numpy scalars and arrays
+    if hasattr(o, "tolist"):
+        return o.tolist()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def chunk_key(chunk: Chunk) -> str:
+    """Hash of a chunk's records, identifying the input a checkpointed output chunk was made from."""
+    h = hashlib.sha256()
+    for record in chunk:
+        h.update(json.dumps(record, default=_json_default, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    # Write to a temporary file first, so an interrupted write never leaves a partial file
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class Checkpoint:
+    """
+    Output chunks of one stage, one JSONL file per chunk with the key of its input chunk next to it,
+    plus a `_DONE` marker once the stage completed.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def _chunk_path(self, idx: int) -> Path:
+        return self.path / f"{idx:05d}.jsonl"
+
+    @property
+    def done(self) -> bool:
+        return (self.path / "_DONE").exists()
+
+    def _key_path(self, idx: int) -> Path:
+        return self.path / f"{idx:05d}.key"
+
+    def has(self, idx: int, key: str) -> bool:
+        """Whether chunk idx was checkpointed from an input chunk with this key."""
+        key_path = self._key_path(idx)
+        return self._chunk_path(idx).exists() and key_path.exists() and key_path.read_text(encoding="utf-8") == key
+
+    def load(self, idx: int) -> Chunk:
+        with open(self._chunk_path(idx), encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def save(self, idx: int, chunk: Chunk, key: Optional[str] = None) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        _write_atomic(
+            self._chunk_path(idx),
+            "".join(json.dumps(record, default=_json_default, ensure_ascii=False) + "\n" for record in chunk),
+        )
+        # The key goes last: if writing stops in between, the old key no longer matches and the chunk is redone
+        if key is not None:
+            _write_atomic(self._key_path(idx), key)
+
+    def mark_done(self, num_chunks: int) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        (self.path / "_DONE").write_text(json.dumps({"chunks": num_chunks}))
+
+    def replay(self) -> Iterator[Chunk]:
+        num_chunks = json.loads((self.path / "_DONE").read_text())["chunks"]
+        for idx in range(num_chunks):
+            yield self.load(idx)
+
+    def clear(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+@dataclass
+class StageStats:
+    stage: str
+    chunks: int = 0
+    replayed: int = 0
+    records_in: int = 0
+    records_out: int = 0
+    busy_s: float = 0.0
+    wall_s: float = 0.0
+    skipped: bool = False
+    metrics: dict[str, int] = field(default_factory=dict)
+
+
+def _chunked(records: list[Record], size: int) -> Iterator[Chunk]:
+    for i in range(0, len(records), size):
+        yield records[i:i + size]
+
+
+def _put(q: queue.Queue, item: Any, abort: threading.Event) -> None:
+    while not abort.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+
+def _get(q: queue.Queue, abort: threading.Event) -> Any:
+    while not abort.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _END
+
+
+def _run_stage(
+    stage: Stage,
+    checkpoint: Checkpoint,
+    stats: StageStats,
+    in_q: queue.Queue,
+    out_q: queue.Queue,
+    abort: threading.Event,
+    errors: list[PipelineError],
+    chunk_size: int,
+) -> None:
+    start = time.perf_counter()
+    stage._pool = ThreadPoolExecutor(max_workers=stage.workers, thread_name_prefix=stage.name) if stage.workers > 1 else None
+    try:
+        stage.setup()
+
+        if stage.barrier:
+            # Barrier output is only valid once complete, partial output from a failed run is discarded
+            checkpoint.clear()
+            while (chunk := _get(in_q, abort)) is not _END:
+                stats.records_in += len(chunk)
+                t0 = time.perf_counter()
+                stage.collect(chunk)
+                stats.busy_s += time.perf_counter() - t0
+            if abort.is_set():
+                return
+
+            t0 = time.perf_counter()
+            records = stage.finish()
+            stats.busy_s += time.perf_counter() - t0
+
+            # Complete the checkpoint before passing chunks on, so a failure downstream keeps this output
+            chunks = list(_chunked(records, chunk_size))
+            for idx, out in enumerate(chunks):
+                checkpoint.save(idx, out)
+            checkpoint.mark_done(len(chunks))
+
+            for out in chunks:
+                stats.chunks += 1
+                stats.records_out += len(out)
+                _put(out_q, out, abort)
+        else:
+            idx = 0
+            while (chunk := _get(in_q, abort)) is not _END:
+                stats.records_in += len(chunk)
+                # Replay only if the chunk was made from the same input, which differs when upstream changed
+                key = chunk_key(chunk)
+                if checkpoint.has(idx, key):
+                    out = checkpoint.load(idx)
+                    stage.observe(out)
+                    stats.replayed += 1
+                else:
+                    t0 = time.perf_counter()
+                    out = stage.process(chunk)
+                    stats.busy_s += time.perf_counter() - t0
+                    checkpoint.save(idx, out, key)
+                stats.chunks += 1
+                stats.records_out += len(out)
+                _put(out_q, out, abort)
+                idx += 1
+
+            if abort.is_set():
+                return
+            checkpoint.mark_done(idx)
+
+        if abort.is_set():
+            return
+        _put(out_q, _END, abort)
+    except Exception as e:
+        logger.exception("Stage '%s' failed", stage.name)
+        stats.metrics["failed"] = 1
+        stage_error = PipelineError(f"Stage '{stage.name}' failed: {e}")
+        stage_error.__cause__ = e
+        errors.append(stage_error)
+        abort.set()
+    finally:
+        stats.wall_s = time.perf_counter() - start
+        stats.metrics.update(stage.metrics)
+        try:
+            stage.close()
+        finally:
+            if stage._pool is not None:
+                stage._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_pipeline(
+    stages: list[Stage],
+    source: Iterable[Chunk],
+    run_dir: Path,
+    chunk_size: int = 32,
+    queue_size: int = 4,
+) -> list[StageStats]:
+    """
+    Runs the stages as a streaming chain over the source chunks, resuming from checkpoints in run_dir.
+
+    Args:
+        stages: Stages in order. The first stage consumes the source chunks.
+        source: Input chunks for the first stage.
+        run_dir: Directory holding the checkpoints of this run.
+        chunk_size: Size of the chunks emitted by barrier stages. Map stages keep their input chunking.
+        queue_size: Maximum number of chunks buffered between two stages.
+
+    Returns:
+        Timings and record counts for each stage
+
+    Raises:
+        PipelineError: If a stage fails. Re-running with the same run_dir resumes the run.
+    """
+    checkpoints = [Checkpoint(run_dir / f"{i:02d}_{s.name}") for i, s in enumerate(stages)]
+    stats = [StageStats(stage=s.name) for s in stages]
+
+    # Start after the last completed stage and replay its output
+    start = max((i for i, c in enumerate(checkpoints) if c.done), default=-1)
+    if start >= 0:
+        logger.info("Resuming from completed stage '%s'", stages[start].name)
+        source = checkpoints[start].replay()
+    for s in stats[:start + 1]:
+        s.skipped = True
+
+    abort = threading.Event()
+    errors: list[PipelineError] = []
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) - start)]
+
+    def feed() -> None:
+        try:
+            for chunk in source:
+                _put(queues[0], chunk, abort)
+                if abort.is_set():
+                    return
+            _put(queues[0], _END, abort)
+        except Exception as e:
+            logger.exception("Reading pipeline input failed")
+            source_error = PipelineError(f"Reading pipeline input failed: {e}")
+            source_error.__cause__ = e
+            errors.append(source_error)
+            abort.set()
+
+    threads = [threading.Thread(target=feed, name="source", daemon=True)]
+    for q_idx, i in enumerate(range(start + 1, len(stages))):
+        threads.append(
+            threading.Thread(
+                target=_run_stage,
+                args=(stages[i], checkpoints[i], stats[i], queues[q_idx], queues[q_idx + 1], abort, errors, chunk_size),
+                name=stages[i].name,
+                daemon=True,
+            )
+        )
+
+    for t in threads:
+        t.start()
+
+    try:
+        # Drain the output of the last stage
+        while _get(queues[-1], abort) is not _END:
+            pass
+    except KeyboardInterrupt:
+        # Stop all stages, checkpoints written so far are kept
+        abort.set()
+        raise
+
+    for t in threads:
+        t.join()
+
+    if errors:
+        raise errors[0]
+    return stats
+
+
+def format_stats(stats: list[StageStats]) -> str:
+    """Stage timings as a plain text table."""
+    header = f"{'stage':<10} {'chunks':>6} {'replayed':>8} {'in':>7} {'out':>7} {'busy_s':>8} {'wall_s':>8}  metrics"
+    lines = [header, "-" * len(header)]
+    for s in stats:
+        if s.skipped:
+            lines.append(f"{s.stage:<10} {'(completed in a previous run)':>49}")
+            continue
+        metrics = ", ".join(f"{k}={v}" for k, v in sorted(s.metrics.items()))
+        lines.append(
+            f"{s.stage:<10} {s.chunks:>6} {s.replayed:>8} {s.records_in:>7} {s.records_out:>7} "
+            f"{s.busy_s:>8.2f} {s.wall_s:>8.2f}  {metrics}"
+        )
+    return "\n".join(lines)
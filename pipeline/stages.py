@@ -0,0 +1,273 @@
+"""
+Pipeline stages: fetch -> clean -> classify -> embed -> cluster -> summarize -> load.
+
+Records are plain dicts so they can be checkpointed as JSON:
+- fetch/clean/classify/embed emit article records
+- cluster/summarize emit cluster records, each carrying its member articles
+- load emits one small record per loaded cluster
+"""
+import logging
+from typing import Any, Optional, Protocol
+
+import numpy as np
+import pandas as pd
+
+from pipeline.clustering import dedupe_all_categories, top_keywords_tf
+from pipeline.dedupe import NearDuplicateIndex
+from pipeline.fetch import clean_record, fetch_feed
+from pipeline.runner import Chunk, Record, Stage
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES = {"Finance", "Music", "Lifestyle", "Sports"}
+
+
+class Classifier(Protocol):
+    def classify(self, summary: str) -> str: ...
+
+
+class Embedder(Protocol):
+    def embed(self, texts: list[str]) -> list[list[float]]: ...
+
+
+class KeywordExtractor(Protocol):
+    def extract(self, texts: list[str]) -> list[list[str]]: ...
+
+
+class Summarizer(Protocol):
+    def summarize(self, summaries: list[str]) -> tuple[str, str]: ...
+
+
+class Sink(Protocol):
+    def open(self) -> None: ...
+    def write(self, clusters_df: pd.DataFrame, articles_df: pd.DataFrame) -> Any: ...
+    def close(self) -> None: ...
+
+
+def _batches(items: list[Any], size: int) -> list[list[Any]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class FetchStage(Stage):
+    """Input: feed records {source, feed_url}. Output: raw article records, feeds fetched concurrently."""
+    name = "fetch"
+
+    def __init__(self, workers: int = 8, limit_per_feed: int = 40):
+        super().__init__(workers)
+        self.limit_per_feed = limit_per_feed
+
+    def _fetch(self, feed: Record) -> Optional[list[Record]]:
+        try:
+            return fetch_feed(feed["source"], feed["feed_url"], self.limit_per_feed)
+        except Exception:
+            logger.warning("Fetching feed failed: %s", feed["feed_url"], exc_info=True)
+            return None
+
+    def process(self, chunk: Chunk) -> Chunk:
+        results = self.map(self._fetch, chunk)
+        self.metrics["failed_feeds"] += sum(records is None for records in results)
+        return [r for records in results if records for r in records]
+
+
+class CleanStage(Stage):
+    """
+    Cleans text, drops records without title/description, deduplicates urls and groups
+    near-duplicate summaries. Adds `summary` and `dup_group` (url of the group's first article).
+    """
+    name = "clean"
+
+    def __init__(self, workers: int = 1, threshold: float = 0.8):
+        super().__init__(workers)
+        self.index = NearDuplicateIndex(threshold=threshold)
+        self.seen_urls: set[str] = set()
+
+    def process(self, chunk: Chunk) -> Chunk:
+        out = []
+        for r in self.map(clean_record, chunk):
+            if r is None or not r["url"]:
+                self.metrics["dropped"] += 1
+                continue
+            # Deduplicate across feeds
+            if r["url"] in self.seen_urls:
+                self.metrics["duplicate_urls"] += 1
+                continue
+            self.seen_urls.add(r["url"])
+
+            r["dup_group"] = self.index.add(r["url"], r["summary"])
+            if r["dup_group"] != r["url"]:
+                self.metrics["near_duplicates"] += 1
+            out.append(r)
+        return out
+
+    def observe(self, chunk: Chunk) -> None:
+        for r in chunk:
+            self.seen_urls.add(r["url"])
+            self.index.add(r["url"], r["summary"], group=r["dup_group"])
+
+
+class ClassifyStage(Stage):
+    """
+    Classifies one representative per near-duplicate group and fans the category out to every member.
+    """
+    name = "classify"
+
+    def __init__(self, classifier: Classifier, workers: int = 8):
+        super().__init__(workers)
+        self.classifier = classifier
+        self.categories: dict[str, Optional[str]] = {}
+
+    def _classify(self, summary: str) -> Optional[str]:
+        try:
+            return self.classifier.classify(summary)
+        except Exception:
+            logger.warning("Classification failed for: %s", summary[:80], exc_info=True)
+            return None
+
+    def process(self, chunk: Chunk) -> Chunk:
+        reps = [r for r in chunk if r["url"] == r["dup_group"]]
+        for r, category in zip(reps, self.map(self._classify, [r["summary"] for r in reps])):
+            self.categories[r["url"]] = category
+            self.metrics["failed"] += category is None
+
+        self.metrics["api_calls"] += len(reps)
+        self.metrics["api_calls_saved"] += len(chunk) - len(reps)
+        return [{**r, "category": self.categories.get(r["dup_group"])} for r in chunk]
+
+    def observe(self, chunk: Chunk) -> None:
+        for r in chunk:
+            if r["url"] == r["dup_group"]:
+                self.categories[r["url"]] = r["category"]
+
+
+class EmbedStage(Stage):
+    """
+    Drops articles outside the news categories, then embeds one representative per near-duplicate
+    group (batched requests, batches run concurrently) and fans the vector out to every member.
+    """
+    name = "embed"
+
+    def __init__(self, embedder: Embedder, workers: int = 4, batch_size: int = 64):
+        super().__init__(workers)
+        self.embedder = embedder
+        self.batch_size = batch_size
+        self.embeddings: dict[str, list[float]] = {}
+
+    def process(self, chunk: Chunk) -> Chunk:
+        kept = [r for r in chunk if r.get("category") in CATEGORIES]
+        self.metrics["filtered"] += len(chunk) - len(kept)
+
+        reps = [r for r in kept if r["url"] == r["dup_group"]]
+        batches = _batches(reps, self.batch_size)
+        for batch, vectors in zip(batches, self.map(self.embedder.embed, [[r["summary"] for r in b] for b in batches])):
+            for r, vec in zip(batch, vectors):
+                self.embeddings[r["url"]] = vec
+
+        self.metrics["api_calls"] += len(batches)
+        self.metrics["embeddings"] += len(reps)
+        self.metrics["embeddings_saved"] += len(kept) - len(reps)
+        return [{**r, "embedding": self.embeddings[r["dup_group"]]} for r in kept]
+
+    def observe(self, chunk: Chunk) -> None:
+        for r in chunk:
+            if r["url"] == r["dup_group"]:
+                self.embeddings[r["url"]] = r["embedding"]
+
+
+class ClusterStage(Stage):
+    """
+    Barrier stage: groups all embedded articles into story clusters per category and extracts keywords.
+    Emits one record per cluster with its member articles.
+    """
+    name = "cluster"
+    barrier = True
+
+    def __init__(self, keyword_extractor: KeywordExtractor, threshold: float = 0.7, k: int = 15, top_n_keywords: int = 10):
+        super().__init__(workers=1)
+        self.keyword_extractor = keyword_extractor
+        self.threshold = threshold
+        self.k = k
+        self.top_n_keywords = top_n_keywords
+        self.records: list[Record] = []
+
+    def collect(self, chunk: Chunk) -> None:
+        self.records.extend(chunk)
+
+    def finish(self) -> list[Record]:
+        if not self.records:
+            return []
+
+        df = pd.DataFrame(self.records)
+        df["embedding"] = df["embedding"].apply(np.asarray)
+        cluster_df, articles_df = dedupe_all_categories(df, threshold=self.threshold, k=self.k)
+        if cluster_df.empty:
+            return []
+
+        cluster_df["keywords"] = self.keyword_extractor.extract(cluster_df["article_summary"].tolist())
+        articles_df["embedding"] = articles_df["embedding"].apply(lambda v: v.tolist())
+        articles_df = articles_df.drop(columns=["description", "dup_group"], errors="ignore")
+        members = {cid: g.to_dict("records") for cid, g in articles_df.groupby("cluster_id", sort=False)}
+
+        out = []
+        for cid, g in cluster_df.groupby("cluster_id", sort=False):
+            out.append({
+                "cluster_id": cid,
+                "category": g["category"].iloc[0],
+                "num_articles": int(g["num_articles"].iloc[0]),
+                "keywords": top_keywords_tf(g["keywords"], top_n=self.top_n_keywords),
+                "articles": members[cid],
+            })
+
+        self.metrics["clusters"] = len(out)
+        self.metrics["unclustered_articles"] = len(df) - len(articles_df)
+        return out
+
+
+class SummarizeStage(Stage):
+    """Generates each cluster's title and summary, then embeds the summaries in one batch per chunk."""
+    name = "summarize"
+
+    def __init__(self, summarizer: Summarizer, embedder: Embedder, workers: int = 8):
+        super().__init__(workers)
+        self.summarizer = summarizer
+        self.embedder = embedder
+
+    def _summarize(self, cluster: Record) -> tuple[str, str]:
+        return self.summarizer.summarize([a["summary"] for a in cluster["articles"]])
+
+    def process(self, chunk: Chunk) -> Chunk:
+        if not chunk:
+            return []
+        contents = self.map(self._summarize, chunk)
+        vectors = self.embedder.embed([summary for _, summary in contents])
+
+        self.metrics["api_calls"] += len(chunk) + 1
+        return [
+            {**c, "title": title, "summary": summary, "embedding": vec}
+            for c, (title, summary), vec in zip(chunk, contents, vectors)
+        ]
+
+
+class LoadStage(Stage):
+    """Writes clusters and their articles to the vector store, one batch per chunk."""
+    name = "load"
+
+    def __init__(self, sink: Sink):
+        super().__init__(workers=1)
+        self.sink = sink
+
+    def setup(self) -> None:
+        self.sink.open()
+
+    def close(self) -> None:
+        self.sink.close()
+
+    def process(self, chunk: Chunk) -> Chunk:
+        if not chunk:
+            return []
+        clusters_df = pd.DataFrame([{k: v for k, v in c.items() if k != "articles"} for c in chunk])
+        articles_df = pd.DataFrame([a for c in chunk for a in c["articles"]])
+        stats = self.sink.write(clusters_df, articles_df)
+
+        self.metrics["clusters_written"] += stats.clusters_written
+        self.metrics["articles_written"] += stats.articles_written
+        return [{"cluster_id": c["cluster_id"], "num_articles": len(c["articles"])} for c in chunk]
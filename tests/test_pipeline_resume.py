@@ -0,0 +1,115 @@
+"""
+Resuming pipeline runs from checkpoints (pipeline.runner and the CLI's resume check).
+"""
+import pytest
+
+from pipeline.cli import _check_resume
+from pipeline.runner import PipelineError, Stage, run_pipeline
+
+
+class Upper(Stage):
+    name = "upper"
+
+    def __init__(self, fail_on=None):
+        super().__init__()
+        self.fail_on = fail_on
+        self.processed = 0
+
+    def process(self, chunk):
+        if self.fail_on and any(r["id"] == self.fail_on for r in chunk):
+            raise RuntimeError("boom")
+        self.processed += 1
+        return [{**r, "text": r["text"].upper()} for r in chunk]
+
+
+class Group(Stage):
+    name = "group"
+    barrier = True
+
+    def __init__(self):
+        super().__init__()
+        self.finished = 0
+        self.records = []
+
+    def collect(self, chunk):
+        self.records.extend(chunk)
+
+    def finish(self):
+        self.finished += 1
+        return sorted(self.records, key=lambda r: r["id"])
+
+
+class Collect(Stage):
+    name = "collect"
+
+    def __init__(self, fail=False):
+        super().__init__()
+        self.fail = fail
+        self.out = []
+
+    def process(self, chunk):
+        if self.fail:
+            raise RuntimeError("boom")
+        self.out.extend(chunk)
+        return chunk
+
+    def observe(self, chunk):
+        self.out.extend(chunk)
+
+
+def _records(*ids):
+    return [{"id": i, "text": f"text {i}"} for i in ids]
+
+
+def test_replays_checkpoints_of_unchanged_chunks(tmp_path):
+    source = [_records("a"), _records("b")]
+    with pytest.raises(PipelineError):
+        run_pipeline([Upper(fail_on="b"), Collect()], source, tmp_path)
+
+    upper, collect = Upper(), Collect()
+    run_pipeline([upper, collect], source, tmp_path)
+    assert upper.processed == 1
+    assert [r["id"] for r in collect.out] == ["a", "b"]
+
+
+def test_reprocesses_chunks_whose_input_changed(tmp_path):
+    with pytest.raises(PipelineError):
+        run_pipeline([Upper(fail_on="b"), Collect()], [_records("a"), _records("b")], tmp_path)
+
+    # Chunk 0 now holds different records, its checkpoint must not be replayed
+    collect = Collect()
+    run_pipeline([Upper(), collect], [_records("a", "b")], tmp_path)
+    assert [r["id"] for r in collect.out] == ["a", "b"]
+    assert all(r["text"].startswith("TEXT") for r in collect.out)
+
+
+def test_barrier_output_survives_downstream_failure(tmp_path):
+    source = [_records("a", "b"), _records("c")]
+    group = Group()
+    with pytest.raises(PipelineError):
+        run_pipeline([Upper(), group, Collect(fail=True)], source, tmp_path, chunk_size=1, queue_size=1)
+    assert group.finished == 1
+
+    group, collect = Group(), Collect()
+    stats = run_pipeline([Upper(), group, collect], source, tmp_path, chunk_size=1, queue_size=1)
+    assert group.finished == 0
+    assert stats[1].skipped
+    assert [r["id"] for r in collect.out] == ["a", "b", "c"]
+
+
+@pytest.mark.parametrize("option, value", [("chunk_size", 1), ("cluster_threshold", 0.5)])
+def test_resume_refuses_changed_options(tmp_path, option, value):
+    options = {
+        "local": True,
+        "feeds_per_chunk": 4,
+        "limit_per_feed": 40,
+        "dedupe_threshold": 0.8,
+        "embedding_dim": None,
+        "cluster_threshold": 0.7,
+        "chunk_size": 16,
+        "workers": {},
+    }
+    _check_resume(tmp_path, options)
+    _check_resume(tmp_path, {**options, "workers": {"embed": 2}})
+    with pytest.raises(SystemExit):
+        _check_resume(tmp_path, {**options, option: value})
@@ -0,0 +1,55 @@
+"""
+Quotas of the shared rate limiter (app.rate_limit).
+"""
+import time
+
+from app.rate_limit import INTERACTIVE, RateLimiter, estimate_message_tokens
+
+
+class Response:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, headers):
+        super().__init__()
+        self.response = Response(headers)
+
+
+def test_unconfigured_limiter_does_not_space_requests():
+    limiter = RateLimiter()
+    t0 = time.monotonic()
+    for _ in range(3):
+        limiter.release(limiter.acquire(tokens=20_000, priority=INTERACTIVE), used_tokens=20_000, latency=0.1)
+    assert time.monotonic() - t0 < 0.1
+
+
+def test_learns_quota_from_429_headers():
+    limiter = RateLimiter()
+    calls = []
+
+    def request():
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise RateLimitError({"x-ratelimit-limit-requests": "600", "x-ratelimit-limit-tokens": "90000", "retry-after": "0"})
+        return "ok"
+
+    assert limiter.call(request, priority=INTERACTIVE) == "ok"
+    assert limiter.requests.rate == 10
+    assert limiter.tokens.rate == 1500
+
+
+def test_configured_quota_is_kept():
+    limiter = RateLimiter(rpm=60)
+    limiter.learn_limits(600, 90_000)
+    assert limiter.requests.rate == 1
+    assert limiter.tokens.rate == 1500
+
+
+def test_message_estimate_counts_tool_schemas():
+    messages = [{"role": "user", "content": "What happened today?"}]
+    tools = [{"type": "function", "function": {"name": "search_clusters", "description": "x" * 4000}}]
+    assert estimate_message_tokens(messages, tools) >= estimate_message_tokens(messages) + 1000
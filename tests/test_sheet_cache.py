@@ -0,0 +1,70 @@
+"""
+Incremental refreshes of the shared sheet data (app.sheet_cache).
+"""
+import pandas as pd
+
+from app.sheet_cache import SheetTable
+
+
+class Worksheet:
+    """The subset of pygsheets.Worksheet used by SheetTable."""
+
+    title = "articles_db"
+
+    def __init__(self, values):
+        self.values = values
+        self.full_loads = 0
+        self.refresh()
+
+    def refresh(self, update_grid=False):
+        self.rows = len(self.values)
+        self.cols = max(len(r) for r in self.values)
+
+    def get_all_values(self, **kwargs):
+        self.full_loads += 1
+        return [list(r) for r in self.values]
+
+    def get_values_batch(self, ranges, **kwargs):
+        return [
+            [list(r[start[1] - 1:end[1]]) for r in self.values[start[0] - 1:end[0]]] or [[""]]
+            for start, end in ranges
+        ]
+
+
+def _table(wks):
+    return SheetTable(lambda: wks, parse=lambda df: df)
+
+
+def test_loads_appended_rows_only():
+    wks = Worksheet([["id", "title"], ["1", "a"], ["2", "b"]])
+    table = _table(wks)
+    table.get()
+    wks.values.append(["3", "c"])
+
+    df = table.refresh()
+    assert wks.full_loads == 1
+    assert df["id"].tolist() == [1, 2, 3]
+
+
+def test_reloads_when_a_column_is_added():
+    wks = Worksheet([["id", "title"], ["1", "a"], ["2", "b"]])
+    table = _table(wks)
+    table.get()
+    wks.values[:] = [row + [value] for row, value in zip(wks.values, ["source", "SBS", "ABC"])]
+    wks.values.append(["3", "c", "SMH"])
+
+    df = table.refresh()
+    assert wks.full_loads == 2
+    assert df["source"].tolist() == ["SBS", "ABC", "SMH"]
+
+
+def test_reloads_when_the_sheet_was_rewritten():
+    wks = Worksheet([["id", "title"], ["1", "a"], ["2", "b"]])
+    table = _table(wks)
+    table.get()
+    wks.values[2] = ["2", "changed"]
+    wks.values.append(["3", "c"])
+
+    df = table.refresh()
+    assert wks.full_loads == 2
+    pd.testing.assert_series_equal(df["title"], pd.Series(["a", "changed", "c"], name="title"))